@@ -0,0 +1,222 @@
+"""
+Микробенчмарк расчётного модуля my_app_api.utils.calculation.
+
+    python -m benchmarks.calculation --output benchmarks/results_calculation.json
+    python -m benchmarks.calculation --baseline benchmarks/results_calculation_base.json --tolerance 0.2
+
+Сначала результаты расчёта сверяются с эталоном benchmarks/calculation_golden.json: при расхождении
+прогон завершается с кодом 1. Затем замеряются пути расчёта на входах от 1 до --max-size состояний:
+время на одну скважину (нс, лучшее из --repeat повторов) и пиковая память (tracemalloc, отдельным прогоном).
+С --baseline прогон также падает, если ns/well любого пути вырос больше чем на --tolerance.
+
+Эталон перезаписывается флагом --update-golden — только при осознанном изменении формул
+(вместе с FORMULA_VERSION).
+"""
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from my_app_api.utils.calculation import (
+    FORMULA_VERSION,
+    CalculationValues,
+    calculate_batch,
+    calculate_many,
+    calculate_values,
+    clear_calculation_cache,
+)
+
+
+GOLDEN_PATH = Path(__file__).with_name("calculation_golden.json")
+GOLDEN_SIZE = 500
+# Граничные входы: пустые значения, нули, отрицательные и очень большие числа
+EDGE_CASES = [(None, None), (0.0, 0.0), (1000.0, None), (None, 10.0), (-100.0, 5.0), (2500.0, -3.0), (1e9, 1e3)]
+
+
+def _inputs(size: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return np.round(rng.uniform(500, 3500, size), 1), np.round(rng.gamma(4.0, 6.0, size), 2)
+
+
+def _golden_inputs() -> tuple[list, list]:
+    depth, pressure = _inputs(GOLDEN_SIZE)
+    depths = [d for d, _ in EDGE_CASES] + depth.tolist()
+    pressures = [p for _, p in EDGE_CASES] + pressure.tolist()
+    return depths, pressures
+
+
+def _batch_values(depths: list, pressures: list) -> list[CalculationValues]:
+    batch = calculate_batch(depths, pressures)
+    return [CalculationValues(*(column[i].item() for column in batch)) for i in range(len(depths))]
+
+
+def check_golden(update: bool = False) -> list[str]:
+    """Сверяет все пути расчёта с эталоном; возвращает список расхождений"""
+    depths, pressures = _golden_inputs()
+    if update:
+        GOLDEN_PATH.write_text(
+            json.dumps(
+                {
+                    "formula_version": FORMULA_VERSION,
+                    "depth": depths,
+                    "pressure": pressures,
+                    "expected": [list(values) for values in _batch_values(depths, pressures)],
+                },
+                indent=1,
+            )
+        )
+        return []
+
+    golden = json.loads(GOLDEN_PATH.read_text())
+    if golden["formula_version"] != FORMULA_VERSION:
+        return [
+            f"Эталон снят для FORMULA_VERSION={golden['formula_version']}, текущая {FORMULA_VERSION}: "
+            "обновите его флагом --update-golden"
+        ]
+
+    clear_calculation_cache()
+    paths = {
+        "batch": _batch_values(golden["depth"], golden["pressure"]),
+        "many": calculate_many(golden["depth"], golden["pressure"]),
+        "scalar": [calculate_values(d, p) for d, p in zip(golden["depth"], golden["pressure"])],
+    }
+    problems = []
+    for path, results in paths.items():
+        for i, (actual, expected) in enumerate(zip(results, golden["expected"])):
+            for name, a, e in zip(CalculationValues._fields, actual, expected):
+                if not math.isclose(a, e, rel_tol=1e-9, abs_tol=1e-12):
+                    inputs = f"depth={golden['depth'][i]}, pressure={golden['pressure'][i]}"
+                    problems.append(f"{path}[{i}] {name}: {a} != {e} ({inputs})")
+    return problems
+
+
+def _best_of(func: Callable[[], object], repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        func()
+        best = min(best, time.perf_counter_ns() - started)
+    return best
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(max_size: int, scalar_max_size: int, repeat: int) -> dict:
+    """
+    Пути расчёта:
+    - batch — calculate_batch на столбцах numpy;
+    - many_cold — calculate_many на новых входах (промахи кэша: ключи + пакетный расчёт + запись в кэш);
+    - many_warm — повторный calculate_many на тех же входах (только попадания в кэш);
+    - scalar — calculate_values по одному состоянию (как в /reports/apply), при пустом кэше.
+    """
+    results = {}
+    size = 1
+    while size <= max_size:
+        depth, pressure = _inputs(size, seed=size)
+        depth_list, pressure_list = depth.tolist(), pressure.tolist()
+
+        def many_cold():
+            clear_calculation_cache()
+            calculate_many(depth_list, pressure_list)
+
+        def scalar():
+            clear_calculation_cache()
+            for d, p in zip(depth_list, pressure_list):
+                calculate_values(d, p)
+
+        paths = {"batch": lambda: calculate_batch(depth, pressure), "many_cold": many_cold}
+        many_cold()
+        paths["many_warm"] = lambda: calculate_many(depth_list, pressure_list)
+        if size <= scalar_max_size:
+            paths["scalar"] = scalar
+
+        for path, func in paths.items():
+            elapsed = _best_of(func, repeat)
+            results.setdefault(path, {})[str(size)] = {
+                "ns_per_well": round(elapsed / size, 1),
+                "total_ms": round(elapsed / 1e6, 3),
+                "peak_memory_bytes": _peak_memory(func),
+            }
+        print(
+            f"{size:>8}: "
+            + "  ".join(f"{path} {results[path][str(size)]['ns_per_well']:>10} нс/скв" for path in paths)
+        )
+        size *= 10
+    clear_calculation_cache()
+    return results
+
+
+def regressions(base: dict, current: dict, tolerance: float) -> list[str]:
+    found = []
+    for path, sizes in current["paths"].items():
+        for size, result in sizes.items():
+            old = base["paths"].get(path, {}).get(size)
+            if old and result["ns_per_well"] > old["ns_per_well"] * (1 + tolerance):
+                found.append(f"{path}, {size} состояний: {old['ns_per_well']} → {result['ns_per_well']} нс/скважину")
+    return found
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Микробенчмарк расчётов")
+    parser.add_argument("--max-size", type=int, default=10**6)
+    parser.add_argument("--scalar-max-size", type=int, default=10**4, help="Скалярный путь медленный — ограничиваем")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmarks/results_calculation.json")
+    parser.add_argument("--baseline", help="Результат прошлого прогона на той же машине")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимый рост ns/well (доля)")
+    parser.add_argument("--update-golden", action="store_true")
+    args = parser.parse_args()
+
+    problems = check_golden(update=args.update_golden)
+    if args.update_golden:
+        print(f"Эталон перезаписан: {GOLDEN_PATH}")
+    if problems:
+        print("Результаты расходятся с эталоном:\n" + "\n".join(problems[:20]))
+        sys.exit(1)
+
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(),
+            "formula_version": FORMULA_VERSION,
+            "numpy": np.__version__,
+            "repeat": args.repeat,
+        },
+        "paths": measure(args.max_size, args.scalar_max_size, args.repeat),
+    }
+    with open(args.output, "w") as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(json.load(file), result, args.tolerance)
+        if found:
+            print("Регрессии производительности:\n" + "\n".join(found))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
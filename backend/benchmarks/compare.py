@@ -0,0 +1,57 @@
+"""
+Сравнение двух результатов benchmarks.load (например, до и после изменения):
+
+    python -m benchmarks.compare base.json new.json --tolerance 0.1
+
+Завершается с кодом 1, если в каком-либо сценарии p95 вырос или пропускная способность упала
+больше чем на --tolerance (доля), либо появились ошибки.
+"""
+import argparse
+import json
+import sys
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare(base: dict, new: dict, tolerance: float) -> list[str]:
+    regressions = []
+    print(f"{'сценарий':>14} {'rps':>22} {'p50, мс':>22} {'p95, мс':>22} {'p99, мс':>22}")
+    for name, result in new["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if old is None:
+            print(f"{name:>14}  нет в базовом прогоне")
+            continue
+        cells = []
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            cells.append(f"{old[metric]:>8} → {result[metric]:<8} {_change(old[metric], result[metric]):+6.1%}")
+        print(f"{name:>14} " + " ".join(f"{cell:>22}" for cell in cells))
+
+        if _change(old["p95_ms"], result["p95_ms"]) > tolerance:
+            regressions.append(f"{name}: p95 {old['p95_ms']} → {result['p95_ms']} мс")
+        if _change(old["rps"], result["rps"]) < -tolerance:
+            regressions.append(f"{name}: rps {old['rps']} → {result['rps']}")
+        if result["errors"] > old["errors"]:
+            regressions.append(f"{name}: ошибок {old['errors']} → {result['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение результатов нагрузочного прогона")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.base) as base_file, open(args.new) as new_file:
+        base, new = json.load(base_file), json.load(new_file)
+    print(f"{base['meta']['commit'][:10]} → {new['meta']['commit'][:10]}")
+    regressions = compare(base, new, args.tolerance)
+    if regressions:
+        print("\nРегрессии:\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
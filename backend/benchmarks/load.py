@@ -0,0 +1,201 @@
+"""
+Нагрузочный прогон реальных маршрутов API с фиксированной конкурентностью.
+
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --concurrency 16 --requests 500 --output results.json
+
+Перед запуском база заполняется benchmarks.seed, а приложение запускается так же, как в продакшене
+(gunicorn/uvicorn с нужным числом воркеров). Каждый сценарий прогоняется отдельно: сначала --warmup
+запросов без учёта, затем --requests запросов в --concurrency параллельных клиентах.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+import httpx
+import numpy as np
+
+
+class Context:
+    """Данные манифеста и токены пользователей, общие для всех сценариев"""
+
+    def __init__(self, manifest: dict, tokens: dict[str, str], rng: random.Random) -> None:
+        self.manifest = manifest
+        self.tokens = tokens
+        self.rng = rng
+        # Для copy/share нужны пользователи, у которых есть свои отчёты
+        self.owners = [email for email, reports in manifest["reports_by_owner"].items() if reports]
+
+    def user(self) -> str:
+        return self.rng.choice(self.manifest["users"])
+
+    def owner(self) -> str:
+        return self.rng.choice(self.owners)
+
+    def headers(self, email: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[email]}"}
+
+
+Scenario = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.post("/auth/login", data={"username": ctx.user(), "password": ctx.manifest["password"]})
+
+
+async def apply(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    body = {
+        "well_id": ctx.rng.choice(ctx.manifest["wells"]),
+        "depth": round(ctx.rng.uniform(500, 3500), 1),
+        "pressure": round(ctx.rng.uniform(5, 60), 2),
+        "title": "benchmark",
+    }
+    return await client.post("/reports/apply", json=body, headers=ctx.headers(ctx.user()))
+
+
+async def list_reports(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/reports/", params={"limit": 50}, headers=ctx.headers(ctx.user()))
+
+
+async def well_states(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/well-states/", params={"well_id": ctx.rng.choice(ctx.manifest["wells"])})
+
+
+async def share(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    owner = ctx.owner()
+    report_id = ctx.rng.choice(ctx.manifest["reports_by_owner"][owner])
+    return await client.post(
+        f"/reports/{report_id}/share", params={"user_email": ctx.user()}, headers=ctx.headers(owner)
+    )
+
+
+async def copy(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    owner = ctx.owner()
+    report_id = ctx.rng.choice(ctx.manifest["reports_by_owner"][owner])
+    return await client.post(f"/reports/{report_id}/copy", headers=ctx.headers(owner))
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "login": login,
+    "apply": apply,
+    "list_reports": list_reports,
+    "well_states": well_states,
+    "share": share,
+    "copy": copy,
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, ctx: Context, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                status = str(response.status_code)
+            except httpx.HTTPError as error:
+                status = type(error).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            # 4xx — ожидаемые ответы (например, повторный share), ошибками считаются 5xx и сбои соединения
+            if not status.isdigit() or int(status) >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    with open(args.manifest) as file:
+        manifest = json.load(file)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        tokens = {}
+        for email in manifest["users"]:
+            response = await client.post("/auth/login", data={"username": email, "password": manifest["password"]})
+            response.raise_for_status()
+            tokens[email] = response.json()["access_token"]
+        ctx = Context(manifest, tokens, rng)
+
+        results = {}
+        for name in args.scenarios:
+            if args.warmup:
+                await run_scenario(client, ctx, SCENARIOS[name], args.warmup, args.concurrency)
+            results[name] = await run_scenario(client, ctx, SCENARIOS[name], args.requests, args.concurrency)
+            print(
+                f"{name:>14}: {results[name]['rps']:>8} rps  p50 {results[name]['p50_ms']:>8} ms  "
+                f"p95 {results[name]['p95_ms']:>8} ms  p99 {results[name]['p99_ms']:>8} ms  "
+                f"ошибок {results[name]['errors']}"
+            )
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "field": manifest["config"],
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default="benchmarks/seed.json")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Запросов на сценарий")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", default="benchmarks/results.json")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    with open(args.output, "w") as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
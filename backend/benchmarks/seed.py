@@ -0,0 +1,28 @@
+"""
+Заполнение локальной PostgreSQL синтетическим месторождением для нагрузочного теста.
+
+    python -m benchmarks.seed --locations 2 --clusters 5 --wells 10 --states 20 --users 20 --reports 2000 --shares 3
+
+Данные создаёт генератор my_app_api.generate (COPY, детерминированный --seed), так что прогоны
+на одинаковых параметрах сравнимы между коммитами. Схема должна быть создана миграциями
+(alembic upgrade head), существующие данные удаляются. Результат — манифест (JSON) с учётными данными
+пользователей и идентификаторами, по которым benchmarks.load строит запросы.
+"""
+import json
+
+from my_app_api.generate import build_parser, config_from_args, generate
+
+
+def main() -> None:
+    parser = build_parser()
+    parser.add_argument("--manifest", default="benchmarks/seed.json")
+    args = parser.parse_args()
+
+    field = generate(args.dsn, config_from_args(args))
+    with open(args.manifest, "w") as file:
+        json.dump(field.manifest(), file, ensure_ascii=False, indent=2)
+    print(f"Манифест записан в {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
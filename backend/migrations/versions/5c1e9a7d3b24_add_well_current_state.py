@@ -0,0 +1,69 @@
+"""Add well current state pointer
+
+Revision ID: 5c1e9a7d3b24
+Revises: 7de7eae0c7d0
+Create Date: 2026-10-18 15:02:41.318204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7d3b24'
+down_revision = '7de7eae0c7d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_well_states_well_id_date_created', 'well_states', ['well_id', 'date_created'])
+    op.add_column('wells', sa.Column('current_state_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('wells_current_state_id_fkey', 'wells', 'well_states', ['current_state_id'], ['id'])
+
+    # Заполняем указатель для уже существующих скважин
+    op.execute(
+        """
+        UPDATE wells SET current_state_id = latest.id
+        FROM (
+            SELECT DISTINCT ON (well_id) id, well_id
+            FROM well_states
+            ORDER BY well_id, date_created DESC NULLS LAST
+        ) AS latest
+        WHERE latest.well_id = wells.id
+        """
+    )
+
+    # Указатель обновляется в той же транзакции, что и вставка состояния, при любом способе вставки
+    op.execute(
+        """
+        CREATE FUNCTION well_states_set_current() RETURNS trigger AS $$
+        BEGIN
+            UPDATE wells SET current_state_id = NEW.id
+            WHERE id = NEW.well_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM well_states
+                  WHERE well_states.id = wells.current_state_id
+                    AND well_states.date_created > NEW.date_created
+              );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER well_states_set_current
+        AFTER INSERT ON well_states
+        FOR EACH ROW EXECUTE FUNCTION well_states_set_current()
+        """
+    )
+
+
+def downgrade():
+    op.execute('DROP TRIGGER well_states_set_current ON well_states')
+    op.execute('DROP FUNCTION well_states_set_current()')
+    op.drop_constraint('wells_current_state_id_fkey', 'wells', type_='foreignkey')
+    op.drop_column('wells', 'current_state_id')
+    op.drop_index('ix_well_states_well_id_date_created', table_name='well_states')
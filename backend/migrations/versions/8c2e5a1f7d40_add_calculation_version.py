@@ -0,0 +1,46 @@
+"""Add calculation version and input hash to report_calculated
+
+Revision ID: 8c2e5a1f7d40
+Revises: 3f9d0c6b2e71
+Create Date: 2026-10-18 18:12:09.514372
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e5a1f7d40'
+down_revision = '3f9d0c6b2e71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('report_calculated', sa.Column('calculation_version', sa.String(), nullable=True))
+    op.add_column('report_calculated', sa.Column('input_hash', sa.String(length=32), nullable=True))
+
+    # Хеш входов расчёта:
+    # NULL и NaN считаются нулём, -0 приводится к 0, хешируется hex-запись IEEE-754 битов
+    op.execute(
+        """
+        CREATE FUNCTION calculation_input_hash(depth double precision, pressure double precision) RETURNS text AS $$
+            SELECT md5(
+                encode(float8send(coalesce(nullif(depth, 'NaN'), 0) + 0), 'hex')
+                || encode(float8send(coalesce(nullif(pressure, 'NaN'), 0) + 0), 'hex')
+            )
+        $$ LANGUAGE sql IMMUTABLE
+        """
+    )
+    # Существующие результаты остаются с NULL-версией и будут пересчитаны фоновой задачей или при чтении
+    op.create_index(
+        'ix_report_calculated_version_input_hash', 'report_calculated', ['calculation_version', 'input_hash']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_report_calculated_version_input_hash', table_name='report_calculated')
+    op.execute('DROP FUNCTION calculation_input_hash(double precision, double precision)')
+    op.drop_column('report_calculated', 'input_hash')
+    op.drop_column('report_calculated', 'calculation_version')
@@ -0,0 +1,48 @@
+"""Add created_at and keyset pagination indexes
+
+Revision ID: a83f2d6c91e0
+Revises: 5c1e9a7d3b24
+Create Date: 2026-10-18 15:40:12.904417
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83f2d6c91e0'
+down_revision = '5c1e9a7d3b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    utc_now = sa.text("timezone('utc', now())")
+    for table in ('locations', 'clusters', 'wells'):
+        op.add_column(table, sa.Column('created_at', sa.DateTime(), server_default=utc_now, nullable=False))
+
+    # Ключ пагинации не должен содержать NULL
+    op.execute("UPDATE well_states SET date_created = timezone('utc', now()) WHERE date_created IS NULL")
+    op.execute("UPDATE reports SET created_at = timezone('utc', now()) WHERE created_at IS NULL")
+    op.alter_column('well_states', 'date_created', existing_type=sa.DateTime(), server_default=utc_now, nullable=False)
+    op.alter_column('reports', 'created_at', existing_type=sa.DateTime(), server_default=utc_now, nullable=False)
+
+    op.create_index('ix_locations_created_at_id', 'locations', ['created_at', 'id'])
+    op.create_index('ix_clusters_created_at_id', 'clusters', ['created_at', 'id'])
+    op.create_index('ix_wells_created_at_id', 'wells', ['created_at', 'id'])
+    op.create_index('ix_well_states_date_created_id', 'well_states', ['date_created', 'id'])
+    op.create_index('ix_reports_created_at_id', 'reports', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_reports_created_at_id', table_name='reports')
+    op.drop_index('ix_well_states_date_created_id', table_name='well_states')
+    op.drop_index('ix_wells_created_at_id', table_name='wells')
+    op.drop_index('ix_clusters_created_at_id', table_name='clusters')
+    op.drop_index('ix_locations_created_at_id', table_name='locations')
+
+    op.alter_column('reports', 'created_at', existing_type=sa.DateTime(), server_default=None, nullable=True)
+    op.alter_column('well_states', 'date_created', existing_type=sa.DateTime(), server_default=None, nullable=True)
+    for table in ('locations', 'clusters', 'wells'):
+        op.drop_column(table, 'created_at')
@@ -0,0 +1,116 @@
+"""Key report_calculated by well state and formula version, drop the input hash
+
+Revision ID: b61d4f3a9e28
+Revises: 8c2e5a1f7d40
+Create Date: 2026-10-18 18:47:26.803155
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61d4f3a9e28'
+down_revision = '8c2e5a1f7d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('report_calculated', sa.Column('well_state_id', sa.UUID(), nullable=True))
+    op.execute(
+        """
+        UPDATE report_calculated SET well_state_id = reports.well_state_id
+        FROM reports WHERE reports.id = report_calculated.report_id
+        """
+    )
+    # Устаревшие результаты (без версии или по другим входам) не переносятся: их пересчитает фоновая задача
+    # или чтение отчёта. Из одинаковых (состояние, версия) остаётся одна строка, отчёты ссылаются на неё
+    op.execute('UPDATE reports SET calculated_id = NULL')
+    op.execute(
+        """
+        WITH actual AS (
+            SELECT report_calculated.id, report_calculated.report_id,
+                   report_calculated.well_state_id, report_calculated.calculation_version
+            FROM report_calculated
+            JOIN well_states ON well_states.id = report_calculated.well_state_id
+            WHERE report_calculated.calculation_version IS NOT NULL
+              AND report_calculated.input_hash = calculation_input_hash(well_states.depth, well_states.pressure)
+        ), keepers AS (
+            SELECT DISTINCT ON (well_state_id, calculation_version) well_state_id, calculation_version, id
+            FROM actual
+            ORDER BY well_state_id, calculation_version, id
+        )
+        UPDATE reports SET calculated_id = keepers.id
+        FROM actual JOIN keepers USING (well_state_id, calculation_version)
+        WHERE actual.report_id = reports.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM report_calculated
+        WHERE NOT EXISTS (SELECT 1 FROM reports WHERE reports.calculated_id = report_calculated.id)
+        """
+    )
+
+    # Результат теперь привязан к состоянию скважины, которое не меняется, поэтому хеш входов больше не нужен
+    op.drop_index('ix_report_calculated_version_input_hash', table_name='report_calculated')
+    op.drop_column('report_calculated', 'input_hash')
+    op.execute('DROP FUNCTION calculation_input_hash(double precision, double precision)')
+
+    op.drop_column('report_calculated', 'report_id')
+    op.alter_column('report_calculated', 'well_state_id', nullable=False)
+    op.alter_column('report_calculated', 'calculation_version', nullable=False)
+    op.create_foreign_key(
+        'report_calculated_well_state_id_fkey', 'report_calculated', 'well_states', ['well_state_id'], ['id']
+    )
+    op.create_unique_constraint(
+        'uq_report_calculated_well_state_version', 'report_calculated', ['well_state_id', 'calculation_version']
+    )
+    op.create_index('ix_reports_calculated_id', 'reports', ['calculated_id'])
+
+
+def downgrade():
+    op.drop_index('ix_reports_calculated_id', table_name='reports')
+    op.drop_constraint('uq_report_calculated_well_state_version', 'report_calculated', type_='unique')
+    op.add_column('report_calculated', sa.Column('report_id', sa.UUID(), nullable=True))
+    op.add_column('report_calculated', sa.Column('input_hash', sa.String(length=32), nullable=True))
+    op.execute(
+        """
+        CREATE FUNCTION calculation_input_hash(depth double precision, pressure double precision) RETURNS text AS $$
+            SELECT md5(
+                encode(float8send(coalesce(nullif(depth, 'NaN'), 0) + 0), 'hex')
+                || encode(float8send(coalesce(nullif(pressure, 'NaN'), 0) + 0), 'hex')
+            )
+        $$ LANGUAGE sql IMMUTABLE
+        """
+    )
+
+    # Каждый отчёт снова получает собственную копию результата
+    op.execute(
+        """
+        INSERT INTO report_calculated (
+            id, report_id, well_state_id, calculation_version, input_hash,
+            effective_pressure, required_charges, gas_volume, impact_duration
+        )
+        SELECT
+            gen_random_uuid(), reports.id, shared.well_state_id, shared.calculation_version,
+            calculation_input_hash(well_states.depth, well_states.pressure),
+            shared.effective_pressure, shared.required_charges, shared.gas_volume, shared.impact_duration
+        FROM reports
+        JOIN report_calculated AS shared ON shared.id = reports.calculated_id
+        JOIN well_states ON well_states.id = shared.well_state_id
+        """
+    )
+    op.execute('UPDATE reports SET calculated_id = NULL')
+    op.execute('DELETE FROM report_calculated WHERE report_id IS NULL')
+
+    op.drop_constraint('report_calculated_well_state_id_fkey', 'report_calculated', type_='foreignkey')
+    op.drop_column('report_calculated', 'well_state_id')
+    op.alter_column('report_calculated', 'calculation_version', nullable=True)
+    op.create_index(
+        'ix_report_calculated_version_input_hash', 'report_calculated', ['calculation_version', 'input_hash']
+    )
+    op.create_foreign_key(None, 'report_calculated', 'reports', ['report_id'], ['id'])
+    op.create_unique_constraint(None, 'report_calculated', ['report_id'])
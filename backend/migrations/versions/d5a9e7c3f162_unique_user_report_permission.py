@@ -0,0 +1,49 @@
+"""Unique user report permission per user and report
+
+Revision ID: d5a9e7c3f162
+Revises: b61d4f3a9e28
+Create Date: 2026-10-18 19:24:51.360218
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9e7c3f162'
+down_revision = 'b61d4f3a9e28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Дубликаты сливаются в одну запись с объединёнными правами
+    op.execute(
+        """
+        UPDATE user_report_permissions SET is_owner = merged.is_owner, can_edit = merged.can_edit
+        FROM (
+            SELECT user_id, report_id, bool_or(is_owner) AS is_owner, bool_or(can_edit) AS can_edit
+            FROM user_report_permissions
+            GROUP BY user_id, report_id
+            HAVING count(*) > 1
+        ) AS merged
+        WHERE user_report_permissions.user_id = merged.user_id
+          AND user_report_permissions.report_id = merged.report_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM user_report_permissions AS duplicate
+        USING user_report_permissions AS keeper
+        WHERE duplicate.user_id = keeper.user_id
+          AND duplicate.report_id = keeper.report_id
+          AND duplicate.id::text > keeper.id::text
+        """
+    )
+    op.create_unique_constraint(
+        'uq_user_report_permissions_user_report', 'user_report_permissions', ['user_id', 'report_id']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_user_report_permissions_user_report', 'user_report_permissions', type_='unique')
@@ -0,0 +1,103 @@
+"""Add report search text with trigram index
+
+Revision ID: e4b7c2a95f18
+Revises: a83f2d6c91e0
+Create Date: 2026-10-18 16:21:05.117630
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c2a95f18'
+down_revision = 'a83f2d6c91e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('reports', sa.Column('search_text', sa.Text(), nullable=True))
+
+    # Текст для поиска: месторождение, куст, скважина и название отчёта в нижнем регистре
+    op.execute(
+        """
+        CREATE FUNCTION report_search_text(state_id uuid, title text) RETURNS text AS $$
+            SELECT lower(concat_ws(' ', locations.name, clusters.name, wells.name, title))
+            FROM well_states
+            JOIN wells ON wells.id = well_states.well_id
+            JOIN clusters ON clusters.id = wells.cluster_id
+            JOIN locations ON locations.id = clusters.location_id
+            WHERE well_states.id = state_id
+        $$ LANGUAGE sql STABLE
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION reports_set_search_text() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_text := report_search_text(NEW.well_state_id, NEW.title);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER reports_set_search_text
+        BEFORE INSERT OR UPDATE OF title, well_state_id ON reports
+        FOR EACH ROW EXECUTE FUNCTION reports_set_search_text()
+        """
+    )
+
+    # Переименование месторождения, куста или скважины пересчитывает текст связанных отчётов
+    op.execute(
+        """
+        CREATE FUNCTION reports_refresh_search_text() RETURNS trigger AS $$
+        BEGIN
+            UPDATE reports SET search_text = report_search_text(reports.well_state_id, reports.title)
+            FROM well_states
+            JOIN wells ON wells.id = well_states.well_id
+            JOIN clusters ON clusters.id = wells.cluster_id
+            WHERE well_states.id = reports.well_state_id
+              AND CASE TG_TABLE_NAME
+                  WHEN 'wells' THEN wells.id = NEW.id
+                  WHEN 'clusters' THEN clusters.id = NEW.id
+                  ELSE clusters.location_id = NEW.id
+              END;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in ('locations', 'clusters', 'wells'):
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_refresh_report_search_text
+            AFTER UPDATE OF name ON {table}
+            FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+            EXECUTE FUNCTION reports_refresh_search_text()
+            """
+        )
+
+    op.execute('UPDATE reports SET search_text = report_search_text(well_state_id, title)')
+    op.create_index(
+        'ix_reports_search_text_trgm',
+        'reports',
+        ['search_text'],
+        postgresql_using='gin',
+        postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reports_search_text_trgm', table_name='reports')
+    for table in ('locations', 'clusters', 'wells'):
+        op.execute(f'DROP TRIGGER {table}_refresh_report_search_text ON {table}')
+    op.execute('DROP FUNCTION reports_refresh_search_text()')
+    op.execute('DROP TRIGGER reports_set_search_text ON reports')
+    op.execute('DROP FUNCTION reports_set_search_text()')
+    op.execute('DROP FUNCTION report_search_text(uuid, text)')
+    op.drop_column('reports', 'search_text')
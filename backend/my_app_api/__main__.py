@@ -1,5 +1,6 @@
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from my_app_api.routes import auth
 from my_app_api.routes import locations
@@ -7,9 +8,18 @@ from my_app_api.routes import clusters
 from my_app_api.routes import wells
 from my_app_api.routes import well_states
 from my_app_api.routes import reports
+from my_app_api.routes import hierarchy
+from my_app_api.routes import jobs
+from my_app_api.utils.metrics import MetricsMiddleware, mark_process_dead, render_metrics
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +28,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(locations.router)
@@ -25,11 +36,19 @@ app.include_router(clusters.router)
 app.include_router(wells.router)
 app.include_router(well_states.router)
 app.include_router(reports.router)
+app.include_router(hierarchy.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
 def read_root():
     return {"message": "API is running"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
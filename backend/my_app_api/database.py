@@ -1,14 +1,193 @@
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from collections import deque
 from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+import logging
 import os
+import random
+import re
+import time
 from dotenv import load_dotenv
 
+from my_app_api.settings import get_settings
+from my_app_api.utils.metrics import current_request, instrument_engine
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+settings = get_settings()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который дополнительно считает время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started_at
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+
+connect_args = {}
+if make_url(DATABASE_URL).get_driver_name() == "asyncpg":
+    connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DB_ECHO,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=connect_args,
+)
+instrument_engine(engine)
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов текущего процесса. Запросы дольше SLOW_QUERY_THRESHOLD_MS пишутся в лог
+    и в кольцевой буфер на SLOW_QUERY_BUFFER_SIZE записей; для доли SLOW_QUERY_EXPLAIN_SAMPLE_RATE из них
+    дополнительно сохраняется план: EXPLAIN (ANALYZE, BUFFERS) для чистых SELECT, для остальных
+    выражений — EXPLAIN без выполнения.
+    """
+
+    _EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "MERGE", "VALUES")
+    # ANALYZE выполняет запрос повторно, и его изменения остались бы в транзакции после RELEASE SAVEPOINT.
+    # Поэтому только SELECT без слов, изменяющих данные (FOR UPDATE тоже отсекается — так надёжнее)
+    _MODIFYING = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|COPY|CALL)\b", re.IGNORECASE)
+
+    def __init__(self) -> None:
+        self.entries: deque[dict] = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+        self.total = 0
+
+    @staticmethod
+    def _parameters_shape(parameters, executemany: bool) -> str:
+        """Типы параметров без значений — в лог не должны попадать пароли и персональные данные"""
+        if executemany:
+            sets = list(parameters)
+            return f"{len(sets)} x {SlowQueryLog._parameters_shape(sets[0], False)}" if sets else "[]"
+        if isinstance(parameters, dict):
+            return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+        if isinstance(parameters, (list, tuple)):
+            return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+        return type(parameters).__name__
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+    @classmethod
+    def _explain_prefix(cls, statement: str) -> Optional[str]:
+        """Вариант EXPLAIN для выражения или None, если план снять нельзя"""
+        head = statement.lstrip().upper()
+        if not head.startswith(cls._EXPLAINABLE):
+            return None
+        if head.startswith("SELECT") and not cls._MODIFYING.search(statement):
+            return "EXPLAIN (ANALYZE, BUFFERS) "
+        return "EXPLAIN "
+
+    @staticmethod
+    def _explain(conn, prefix: str, statement: str, parameters) -> str:
+        """
+        Выполняет EXPLAIN отдельным курсором того же соединения. Запрос оборачивается в SAVEPOINT,
+        чтобы ошибка EXPLAIN не прервала транзакцию приложения.
+        """
+        explain_cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+            except Exception:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        finally:
+            explain_cursor.close()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("slow_query_started_at", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        duration_ms = (time.perf_counter() - conn.info["slow_query_started_at"].pop()) * 1000
+        if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+            return
+
+        request = current_request.get()
+        entry = {
+            "at": datetime.utcnow(),
+            "duration_ms": round(duration_ms, 3),
+            "route": f"{request.scope['method']} {request.route}" if request is not None else None,
+            "statement": statement,
+            "parameters": self._parameters_shape(parameters, executemany),
+            "plan": None,
+        }
+        logger.warning(
+            "Медленный запрос %.1f мс (%s): %s; параметры: %s",
+            duration_ms,
+            entry["route"] or "вне запроса",
+            statement,
+            entry["parameters"],
+        )
+
+        prefix = self._explain_prefix(statement) if not executemany else None
+        if settings.SLOW_QUERY_EXPLAIN and prefix and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            try:
+                entry["plan"] = self._explain(conn, prefix, statement, parameters)
+            except Exception as error:
+                logger.info("Не удалось получить план медленного запроса: %s", error)
+
+        self.entries.append(entry)
+        self.total += 1
+
+    def _handle_error(self, context) -> None:
+        # after_cursor_execute для упавшего выражения не вызывается: время его начала снимается здесь,
+        # иначе стек растёт и следующие запросы соединения меряются от чужого начала
+        started = context.connection.info.get("slow_query_started_at") if context.connection is not None else None
+        if started and context.execution_context is not None and not context.is_pre_ping:
+            started.pop()
+
+    def install(self, engine) -> None:
+        if settings.SLOW_QUERY_THRESHOLD_MS <= 0:
+            return
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine.sync_engine, "handle_error", self._handle_error)
+
+    def stats(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+            "explain": settings.SLOW_QUERY_EXPLAIN,
+            "explain_sample_rate": settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            "total": self.total,
+            "entries": list(reversed(self.entries)),  # Сначала самые свежие
+        }
+
+
+slow_query_log = SlowQueryLog()
+slow_query_log.install(engine)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 Base = declarative_base()
@@ -16,3 +195,20 @@ Base = declarative_base()
 async def get_async_session() -> AsyncSession:
     async with async_session_maker() as session:
         yield session
+
+
+def pool_stats() -> dict:
+    """Состояние пула текущего процесса (каждый воркер gunicorn держит собственный пул)"""
+    pool = engine.pool
+    return {
+        "pid": os.getpid(),
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "wait_seconds_avg": pool.wait_seconds_total / pool.checkouts if pool.checkouts else 0.0,
+        "wait_seconds_max": pool.wait_seconds_max,
+    }
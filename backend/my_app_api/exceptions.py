@@ -3,3 +3,10 @@ class APIError(Exception):
 
     def __init__(self, message: str) -> None:
         super().__init__(message)
+
+
+class PasswordHashingBusyError(APIError):
+    """Очередь хеширования паролей переполнена"""
+
+    def __init__(self) -> None:
+        super().__init__("Password hashing queue is full")
@@ -0,0 +1,299 @@
+"""
+Генератор синтетических данных месторождения для нагрузочного тестирования.
+
+    python -m my_app_api.generate --locations 5 --clusters 20 --wells 30 --states 200 --users 500 --reports 1000000
+
+Заполняет таблицы Location/Cluster/Well/WellState/Report/ReportCalculated/UserReportPermission
+командой COPY, минуя ORM. Распределения приближены к реальным: число замеров на скважину
+сильно неравномерно (логнормальное), замеры упорядочены по времени, у отчётов есть «активные» авторы,
+а часть отчётов расшарена на большую долю пользователей. При одинаковом --seed результат идентичен.
+ВНИМАНИЕ: перед загрузкой все перечисленные таблицы и users очищаются.
+"""
+import argparse
+import io
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Optional, Sequence
+
+import numpy as np
+from passlib.hash import bcrypt
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from my_app_api.settings import get_settings
+from my_app_api.utils.calculation import FORMULA_VERSION, calculate_batch
+
+
+COPY_CHUNK = 200_000
+PASSWORD = "benchmark"
+PERIOD_START = np.datetime64("2020-01-01T00:00:00", "us")
+PERIOD_SECONDS = 4 * 365 * 24 * 3600
+
+
+@dataclass
+class FieldConfig:
+    locations: int = 2
+    clusters: int = 5  # Кустов на месторождение
+    wells: int = 10  # Скважин на куст
+    states: int = 20  # Среднее число замеров на скважину
+    states_sigma: float = 1.0  # Разброс логнормального распределения замеров по скважинам
+    users: int = 20
+    reports: int = 2000
+    shares: float = 3.0  # Среднее число пользователей, получивших доступ к обычному отчёту
+    wide_share_fraction: float = 0.02  # Доля отчётов, расшаренных на большую часть пользователей
+    seed: int = 42
+
+
+@dataclass
+class GeneratedField:
+    """Идентификаторы созданных объектов, нужные нагрузочному тесту"""
+
+    config: FieldConfig
+    password: str
+    users: list[str]
+    wells: list[str]
+    reports_by_owner: dict[str, list[str]]
+
+    def manifest(self) -> dict:
+        return {**asdict(self), "config": asdict(self.config)}
+
+
+def _uuids(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Случайные UUID версии 4 в виде 32 hex-символов (PostgreSQL принимает такую запись)"""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hexed = raw.tobytes().hex()
+    return np.array([hexed[i : i + 32] for i in range(0, len(hexed), 32)], dtype=object)
+
+
+def _timestamps(offsets_seconds: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(PERIOD_START + (offsets_seconds * 1e6).astype("timedelta64[us]"), unit="us")
+
+
+def _copy(cursor, table: str, columns: dict[str, Sequence]) -> int:
+    """COPY столбцов в таблицу порциями по COPY_CHUNK строк; None записывается как NULL"""
+    names = list(columns)
+    values = [np.asarray(column, dtype=object) for column in columns.values()]
+    total = len(values[0]) if values else 0
+    for start in range(0, total, COPY_CHUNK):
+        chunk = [column[start : start + COPY_CHUNK] for column in values]
+        rows = ("\t".join("\\N" if value is None else str(value) for value in row) for row in zip(*chunk))
+        buffer = io.StringIO("\n".join(rows) + "\n")
+        cursor.copy_expert(f"COPY {table} ({', '.join(names)}) FROM STDIN", buffer)
+    return total
+
+
+def generate(dsn: str, config: FieldConfig, log=print) -> GeneratedField:
+    rng = np.random.default_rng(config.seed)
+    started = time.perf_counter()
+
+    # --- справочники ---
+    users = _uuids(rng, config.users)
+    emails = np.array([f"user{i}@benchmark.local" for i in range(config.users)], dtype=object)
+    locations = _uuids(rng, config.locations)
+    clusters = _uuids(rng, config.locations * config.clusters)
+    cluster_location = np.repeat(np.arange(config.locations), config.clusters)
+    wells = _uuids(rng, len(clusters) * config.wells)
+    well_cluster = np.repeat(np.arange(len(clusters)), config.wells)
+
+    # --- замеры: логнормальное число на скважину, по времени внутри скважины ---
+    mu = np.log(max(config.states, 1)) - config.states_sigma**2 / 2
+    per_well = np.maximum(1, np.rint(rng.lognormal(mu, config.states_sigma, size=len(wells)))).astype(np.int64)
+    state_well = np.repeat(np.arange(len(wells)), per_well)
+    state_offset = rng.uniform(0, PERIOD_SECONDS, size=len(state_well))
+    order = np.lexsort((state_offset, state_well))
+    state_well, state_offset = state_well[order], state_offset[order]
+    states = _uuids(rng, len(state_well))
+    depth = np.round(rng.uniform(500, 3500, size=len(states)), 1)
+    pressure = np.round(rng.gamma(4.0, 6.0, size=len(states)), 2)
+
+    # --- отчёты: авторы по закону Ципфа, отчёт создаётся после замера ---
+    author_weights = 1.0 / np.arange(1, config.users + 1) ** 1.1
+    report_owner = rng.choice(config.users, size=config.reports, p=author_weights / author_weights.sum())
+    report_state = rng.integers(0, len(states), size=config.reports)
+    report_delay = rng.exponential(3 * 24 * 3600, size=config.reports)
+    report_offset = np.minimum(state_offset[report_state] + report_delay, PERIOD_SECONDS)
+    reports = _uuids(rng, config.reports)
+
+    # --- расчёты: одна строка на использованное отчётами состояние, отчёты ссылаются на неё ---
+    calculated_states = np.unique(report_state)
+    calculated_ids = _uuids(rng, len(calculated_states))
+    report_calculated = np.searchsorted(calculated_states, report_state)
+    calculated = calculate_batch(depth[calculated_states], pressure[calculated_states])
+
+    # --- доступы: владелец + обычные (пуассоновские) и «широкие» расшаривания ---
+    share_count = rng.poisson(config.shares, size=config.reports)
+    wide = rng.random(config.reports) < config.wide_share_fraction
+    share_count[wide] = rng.integers(config.users // 2, config.users + 1, size=int(wide.sum()))
+    share_report = np.repeat(np.arange(config.reports), share_count)
+    share_user = rng.integers(0, config.users, size=len(share_report))
+    pairs = np.unique(share_report.astype(np.int64) * config.users + share_user)
+    share_report, share_user = pairs // config.users, pairs % config.users
+    keep = share_user != report_owner[share_report]
+    share_report, share_user = share_report[keep], share_user[keep]
+    log(
+        f"Сгенерировано за {time.perf_counter() - started:.1f} с: {len(wells)} скважин, {len(states)} замеров, "
+        f"{config.reports} отчётов, {len(share_report)} расшариваний"
+    )
+
+    url = make_url(dsn).set(drivername="postgresql+psycopg2")
+    engine = create_engine(url)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            "TRUNCATE report_calculated, user_report_permissions, reports, well_states, wells, clusters, "
+            "locations, users CASCADE"
+        )
+        # Построчные триггеры при массовой загрузке заменяются одним проходом в конце
+        cursor.execute("ALTER TABLE well_states DISABLE TRIGGER well_states_set_current")
+        cursor.execute("ALTER TABLE reports DISABLE TRIGGER reports_set_search_text")
+
+        now = datetime.utcnow().isoformat()
+        is_admin = np.zeros(config.users, dtype=bool)
+        is_admin[:1] = True
+        tables = [
+            (
+                "users",
+                {
+                    "id": users,
+                    "email": emails,
+                    "password_hash": [bcrypt.hash(PASSWORD)] * config.users,  # Совместим с pwd_context из utils.auth
+                    "is_admin": is_admin,
+                },
+            ),
+            (
+                "locations",
+                {
+                    "id": locations,
+                    "name": [f"Месторождение {i}" for i in range(len(locations))],
+                    "created_at": [now] * len(locations),
+                },
+            ),
+            (
+                "clusters",
+                {
+                    "id": clusters,
+                    "name": [f"Куст {i}" for i in range(len(clusters))],
+                    "location_id": locations[cluster_location],
+                    "created_at": [now] * len(clusters),
+                },
+            ),
+            (
+                "wells",
+                {
+                    "id": wells,
+                    "name": [f"Скважина {i}" for i in range(len(wells))],
+                    "cluster_id": clusters[well_cluster],
+                    "created_at": [now] * len(wells),
+                },
+            ),
+            (
+                "well_states",
+                {
+                    "id": states,
+                    "well_id": wells[state_well],
+                    "date_created": _timestamps(state_offset),
+                    "depth": depth,
+                    "pressure": pressure,
+                },
+            ),
+            (
+                "report_calculated",
+                {
+                    "id": calculated_ids,
+                    "well_state_id": states[calculated_states],
+                    **{name: getattr(calculated, name) for name in calculated._fields},
+                    "calculation_version": np.full(len(calculated_states), FORMULA_VERSION, dtype=object),
+                },
+            ),
+            (
+                "reports",
+                {
+                    "id": reports,
+                    "well_state_id": states[report_state],
+                    "calculated_id": calculated_ids[report_calculated],
+                    "created_by": users[report_owner],
+                    "created_at": _timestamps(report_offset),
+                    "title": [f"Отчёт {i}" for i in range(config.reports)],
+                },
+            ),
+            (
+                "user_report_permissions",
+                {
+                    "id": _uuids(rng, config.reports + len(share_report)),
+                    "user_id": np.concatenate([users[report_owner], users[share_user]]),
+                    "report_id": np.concatenate([reports, reports[share_report]]),
+                    "is_owner": np.concatenate([np.ones(config.reports, bool), np.zeros(len(share_report), bool)]),
+                    "can_edit": np.concatenate([np.ones(config.reports, bool), np.zeros(len(share_report), bool)]),
+                },
+            ),
+        ]
+        for table, columns in tables:
+            table_started = time.perf_counter()
+            count = _copy(cursor, table, columns)
+            log(f"{table}: {count} строк за {time.perf_counter() - table_started:.1f} с")
+
+        step_started = time.perf_counter()
+        cursor.execute(
+            """
+            UPDATE wells SET current_state_id = latest.id
+            FROM (
+                SELECT DISTINCT ON (well_id) id, well_id
+                FROM well_states
+                ORDER BY well_id, date_created DESC NULLS LAST
+            ) AS latest
+            WHERE latest.well_id = wells.id
+            """
+        )
+        cursor.execute("UPDATE reports SET search_text = report_search_text(well_state_id, title)")
+        cursor.execute("ALTER TABLE well_states ENABLE TRIGGER well_states_set_current")
+        cursor.execute("ALTER TABLE reports ENABLE TRIGGER reports_set_search_text")
+        log(f"Производные поля (current_state_id, search_text) за {time.perf_counter() - step_started:.1f} с")
+
+        connection.commit()
+        # Статистика для планировщика. psycopg2 открыл для ANALYZE новую транзакцию: без commit
+        # закрытие соединения откатит её, и таблицы останутся без статистики
+        cursor.execute("ANALYZE")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+        engine.dispose()
+    log(f"Готово за {time.perf_counter() - started:.1f} с")
+
+    owners = {email: [] for email in emails}
+    for report_id, owner in zip(reports, report_owner):
+        owners[emails[owner]].append(str(report_id))
+    return GeneratedField(
+        config=config,
+        password=PASSWORD,
+        users=list(emails),
+        wells=[str(well) for well in wells],
+        reports_by_owner=owners,
+    )
+
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(description="Синтетическое месторождение (таблицы очищаются!)")
+    for field in fields(FieldConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=field.type, default=field.default)
+    parser.add_argument("--dsn", default=get_settings().DB_DSN, help="Строка подключения к PostgreSQL")
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> FieldConfig:
+    return FieldConfig(**{field.name: getattr(args, field.name) for field in fields(FieldConfig)})
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    generate(args.dsn, config_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
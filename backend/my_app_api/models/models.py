@@ -1,6 +1,8 @@
 
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Column, String, Boolean, ForeignKey, DateTime, Integer, Index, Text, FetchedValue, UniqueConstraint
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.types import Float
 import uuid
@@ -17,7 +19,6 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     is_admin = Column(Boolean, default=False)
 
-    well_states = relationship("WellState", back_populates="user")
     reports_created = relationship("Report", back_populates="creator")
     permissions = relationship("UserReportPermission", back_populates="user")
 
@@ -25,19 +26,23 @@ class User(Base):
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (Index("ix_locations_created_at_id", "created_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False, unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     clusters = relationship("Cluster", back_populates="location")
 
 
 class Cluster(Base):
     __tablename__ = "clusters"
+    __table_args__ = (Index("ix_clusters_created_at_id", "created_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     location_id = Column(UUID(as_uuid=True), ForeignKey("locations.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     location = relationship("Location", back_populates="clusters")
     wells = relationship("Well", back_populates="cluster")
@@ -45,51 +50,78 @@ class Cluster(Base):
 
 class Well(Base):
     __tablename__ = "wells"
+    __table_args__ = (Index("ix_wells_created_at_id", "created_at", "id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     cluster_id = Column(UUID(as_uuid=True), ForeignKey("clusters.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Последнее состояние скважины. Поддерживается триггером well_states_set_current при вставке в well_states
+    current_state_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("well_states.id", use_alter=True, name="wells_current_state_id_fkey"),
+        nullable=True,
+    )
 
     cluster = relationship("Cluster", back_populates="wells")
-    states = relationship("WellState", back_populates="well")
+    states = relationship("WellState", back_populates="well", foreign_keys="WellState.well_id")
+    current_state = relationship("WellState", foreign_keys=[current_state_id], viewonly=True)
 
 
 class WellState(Base):
     __tablename__ = "well_states"
+    __table_args__ = (
+        Index("ix_well_states_well_id_date_created", "well_id", "date_created"),
+        Index("ix_well_states_date_created_id", "date_created", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     well_id = Column(UUID(as_uuid=True), ForeignKey("wells.id"), nullable=False)
-    date_created = Column(DateTime, default=datetime.utcnow)
+    date_created = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     depth = Column(Float)
     pressure = Column(Float)
     # Здесь могут быть добавлены другие параметры
 
-    well = relationship("Well", back_populates="states")
-    user = relationship("User", back_populates="well_states")
+    well = relationship("Well", back_populates="states", foreign_keys=[well_id])
     reports = relationship("Report", back_populates="well_state")
 
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_created_at_id", "created_at", "id"),
+        Index("ix_reports_calculated_id", "calculated_id"),
+        Index(
+            "ix_reports_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     well_state_id = Column(UUID(as_uuid=True), ForeignKey("well_states.id"), nullable=False)
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Общий для всех отчётов с тем же состоянием скважины результат расчёта текущей (или прошлой) версии формул
     calculated_id = Column(UUID(as_uuid=True), ForeignKey("report_calculated.id"), nullable=True)
 
     # Добавьте сюда все расчётные поля
     title = Column(String, nullable=True)
+    # Месторождение, куст, скважина и название одной строкой. Заполняется триггером reports_set_search_text
+    search_text = Column(Text, server_default=FetchedValue(), server_onupdate=FetchedValue())
 
     well_state = relationship("WellState", back_populates="reports")
     creator = relationship("User", back_populates="reports_created")
     permissions = relationship("UserReportPermission", back_populates="report")
-    calculated = relationship("ReportCalculated", uselist=False, back_populates="report")
+    calculated = relationship("ReportCalculated", back_populates="reports", foreign_keys=[calculated_id])
 
 
 class UserReportPermission(Base):
     __tablename__ = "user_report_permissions"
+    # Одна запись прав на пару (пользователь, отчёт): выдача доступа — upsert, повтор ловит сама БД
+    __table_args__ = (UniqueConstraint("user_id", "report_id", name="uq_user_report_permissions_user_report"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -101,10 +133,20 @@ class UserReportPermission(Base):
     report = relationship("Report", back_populates="permissions")
 
 class ReportCalculated(Base):
+    """
+    Результат расчёта состояния скважины по версии формул. Адресуется содержимым: на одну строку
+    (well_state_id, calculation_version) ссылаются все отчёты с этим состоянием через Report.calculated_id.
+    """
+
     __tablename__ = "report_calculated"
+    __table_args__ = (
+        UniqueConstraint("well_state_id", "calculation_version", name="uq_report_calculated_well_state_version"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    report_id = Column(UUID(as_uuid=True), ForeignKey("reports.id"), unique=True)
+    well_state_id = Column(UUID(as_uuid=True), ForeignKey("well_states.id"), nullable=False)
+    # Версия формул, по которой получен результат
+    calculation_version = Column(String, nullable=False)
 
     # Пример расчётных полей:
     effective_pressure = Column(Float, nullable=True)
@@ -112,4 +154,33 @@ class ReportCalculated(Base):
     gas_volume = Column(Float, nullable=True)
     impact_duration = Column(Float, nullable=True)
 
-    report = relationship("Report", back_populates="calculated")
+    reports = relationship("Report", back_populates="calculated", foreign_keys="Report.calculated_id")
+
+
+class Job(Base):
+    """
+    Фоновая задача (например, пересчёт всех отчётов). Выполняется процессом my_app_api.worker;
+    checkpoint и processed обновляются в одной транзакции с результатом каждой порции,
+    поэтому после падения воркера задача продолжается с места остановки.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_created_at", "status", "created_at"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    params = Column(JSONB, nullable=False, default=dict)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    checkpoint = Column(String, nullable=True)  # Ключ последней обработанной записи
+
+    worker = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
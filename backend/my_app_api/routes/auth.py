@@ -1,33 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel
 
 from my_app_api.database import get_async_session
+from my_app_api.exceptions import PasswordHashingBusyError
 from my_app_api.models.models import User
-from my_app_api.utils.auth import hash_password, verify_password, create_access_token, decode_access_token
+from my_app_api.utils.auth import (
+    hash_password_async, verify_password_async, create_access_token, decode_access_token, oauth2_scheme
+)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
 
 class UserCreate(BaseModel):
-    username: str
+    email: str
     password: str
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server is busy, try again later", headers={"Retry-After": "1"})
+
+
 @router.post("/register")
 async def register(user_data: UserCreate, session: AsyncSession = Depends(get_async_session)):
-    result = await session.execute(select(User).where(User.username == user_data.username))
+    result = await session.execute(select(User).where(User.email == user_data.email))
     existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
 
+    try:
+        password_hash = await hash_password_async(user_data.password)
+    except PasswordHashingBusyError:
+        raise _hashing_busy()
+
     new_user = User(
-        username=user_data.username,
-        hashed_password=hash_password(user_data.password)
+        email=user_data.email,
+        password_hash=password_hash
     )
     session.add(new_user)
     await session.commit()
@@ -36,12 +46,17 @@ async def register(user_data: UserCreate, session: AsyncSession = Depends(get_as
 
 @router.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_async_session)):
-    result = await session.execute(select(User).where(User.username == form_data.username))
+    # В поле username формы OAuth2 передаётся email
+    result = await session.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        valid = user is not None and await verify_password_async(form_data.password, user.password_hash)
+    except PasswordHashingBusyError:
+        raise _hashing_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -4,14 +4,19 @@ from sqlalchemy.future import select
 
 from my_app_api.database import get_async_session
 from my_app_api.models.models import Cluster
-from my_app_api.schemas.schemas import ClusterCreate, ClusterOut
+from my_app_api.schemas.schemas import ClusterCreate, ClusterOut, Page
+from my_app_api.utils.conditional import conditional_get, mark_modified
+from my_app_api.utils.hierarchy import invalidate_hierarchy
+from my_app_api.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter(prefix="/clusters", tags=["Кусты"])
 
-@router.get("/", response_model=list[ClusterOut])
-async def get_clusters(session: AsyncSession = Depends(get_async_session)):
-    result = await session.execute(select(Cluster))
-    return result.scalars().all()
+@router.get("/", response_model=Page[ClusterOut], dependencies=[Depends(conditional_get("clusters"))])
+async def get_clusters(
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session)
+):
+    return await paginate(session, select(Cluster), Cluster.created_at, Cluster.id, page)
 
 
 @router.post("/", response_model=ClusterOut)
@@ -19,5 +24,7 @@ async def create_cluster(cluster: ClusterCreate, session: AsyncSession = Depends
     new_cluster = Cluster(**cluster.dict())
     session.add(new_cluster)
     await session.commit()
+    invalidate_hierarchy()
+    mark_modified("clusters")
     await session.refresh(new_cluster)
     return new_cluster
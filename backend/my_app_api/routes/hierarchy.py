@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from my_app_api.database import get_async_session
+from my_app_api.schemas.schemas import HierarchyLocation
+from my_app_api.utils.conditional import etag_matches
+from my_app_api.utils.hierarchy import cached_hierarchy, load_hierarchy
+
+router = APIRouter(prefix="/hierarchy", tags=["Иерархия"])
+
+
+@router.get("/", response_model=list[HierarchyLocation])
+async def get_hierarchy(
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session)  # Соединение берётся из пула только при промахе кэша
+):
+    """Дерево месторождение → куст → скважина одним ответом. Повторный запрос с If-None-Match получает 304"""
+    snapshot = cached_hierarchy() or await load_hierarchy(session)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
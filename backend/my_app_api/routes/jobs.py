@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from uuid import UUID
+
+from my_app_api.database import get_async_session
+from my_app_api.models.models import Job, Report
+from my_app_api.schemas.schemas import JobOut
+from my_app_api.utils.auth import Principal, get_admin_user
+from my_app_api.utils.calculation import FORMULA_VERSION, stale_reports_query
+from my_app_api.utils.jobs import ACTIVE_STATUSES, job_progress
+
+router = APIRouter(prefix="/jobs", tags=["Фоновые задачи"])
+
+
+def _job_out(job: Job) -> JobOut:
+    columns = {column.name: getattr(job, column.name) for column in Job.__table__.columns}
+    return JobOut.model_validate({**columns, **job_progress(job)})
+
+
+@router.get("/recalculate/stale")
+async def get_stale_calculations(
+    admin: Principal = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Сколько отчётов имеют расчёт другой версии формул, по изменившимся входам или не имеют его вовсе"""
+    stale = (await session.execute(select(func.count()).select_from(stale_reports_query().subquery()))).scalar_one()
+    return {"formula_version": FORMULA_VERSION, "stale": stale}
+
+
+@router.post("/recalculate", response_model=JobOut, status_code=202)
+async def recalculate_reports(
+    only_stale: bool = True,
+    admin: Principal = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Ставит в очередь пересчёт ReportCalculated; выполняется процессами my_app_api.worker.
+    По умолчанию пересчитываются только устаревшие результаты, с only_stale=false — все отчёты.
+    """
+    result = await session.execute(
+        select(Job.id).where(Job.kind == "recalculate", Job.status.in_(ACTIVE_STATUSES))
+    )
+    active_id = result.scalars().first()
+    if active_id:
+        raise HTTPException(status_code=409, detail=f"Пересчёт уже выполняется: задача {active_id}")
+
+    source = stale_reports_query().subquery() if only_stale else Report
+    total = (await session.execute(select(func.count()).select_from(source))).scalar_one()
+    job = Job(
+        kind="recalculate",
+        status="pending",
+        params={"formula_version": FORMULA_VERSION, "only_stale": only_stale},
+        created_by=admin.id,
+        total=total,
+        processed=0,
+        attempts=0,
+    )
+    session.add(job)
+    await session.commit()
+    return _job_out(job)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(
+    job_id: UUID,
+    admin: Principal = Depends(get_admin_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return _job_out(job)
@@ -5,14 +5,19 @@ from uuid import UUID
 
 from my_app_api.database import get_async_session
 from my_app_api.models.models import Location
-from my_app_api.schemas.schemas import LocationCreate, LocationOut
+from my_app_api.schemas.schemas import LocationCreate, LocationOut, Page
+from my_app_api.utils.conditional import conditional_get, mark_modified
+from my_app_api.utils.hierarchy import invalidate_hierarchy
+from my_app_api.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter(prefix="/locations", tags=["Месторождения"])
 
-@router.get("/", response_model=list[LocationOut])
-async def get_locations(session: AsyncSession = Depends(get_async_session)):
-    result = await session.execute(select(Location))
-    return result.scalars().all()
+@router.get("/", response_model=Page[LocationOut], dependencies=[Depends(conditional_get("locations"))])
+async def get_locations(
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session)
+):
+    return await paginate(session, select(Location), Location.created_at, Location.id, page)
 
 
 @router.post("/", response_model=LocationOut)
@@ -20,5 +25,7 @@ async def create_location(location: LocationCreate, session: AsyncSession = Depe
     new_location = Location(**location.dict())
     session.add(new_location)
     await session.commit()
+    invalidate_hierarchy()
+    mark_modified("locations")
     await session.refresh(new_location)
     return new_location
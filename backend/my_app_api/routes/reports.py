@@ -1,94 +1,193 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from uuid import UUID, uuid4
 from datetime import datetime
+from typing import Literal, Optional
 
-from my_app_api.database import get_async_session
+from my_app_api.database import get_async_session, pool_stats, slow_query_log
 from my_app_api.models.models import (
-    Report, ReportCalculated, UserReportPermission, WellState
+    Cluster, Location, Report, ReportCalculated, UserReportPermission, Well, WellState
+)
+from my_app_api.schemas.report_calculated import ReportCalculatedRead
+from my_app_api.schemas.schemas import Page, ReportApplyData, ReportApplyResult, ReportOut
+from my_app_api.utils.auth import Principal, get_admin_user, get_current_user, password_hash_pool
+from my_app_api.utils.loaders import loader_options
+from my_app_api.utils.pagination import PageParams, page_params, paginate
+from my_app_api.utils.permissions import authorize_report
+from my_app_api.utils.export import csv_chunks, ndjson_chunks
+from my_app_api.utils.calculation import (
+    calculation_cache_stats, calculations_for_states, input_errors, mark_stale_calculations, refresh_stale_calculations
 )
-from my_app_api.schemas.schemas import ReportCreate, ReportOut
-from my_app_api.utils.auth import get_current_user
-from my_app_api.utils.calculation import calculate_from_well_state
 from my_app_api.models.models import User
 
 from fastapi import Path
-from sqlalchemy import update, delete
+from sqlalchemy import update, delete, exists, func, insert, literal, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 router = APIRouter(prefix="/reports", tags=["Отчёты"])
 
-# ===== Админ-зависимость =====
-def get_admin_user(current_user: User = Depends(get_current_user)):
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Недостаточно прав")
-    return current_user
+async def _load_report_out(session: AsyncSession, report_id: UUID) -> Report:
+    """Перечитывает отчёт со всеми связями, нужными ReportOut"""
+    result = await session.execute(
+        select(Report)
+        .options(*loader_options(ReportOut))
+        .where(Report.id == report_id)
+        .execution_options(populate_existing=True)
+    )
+    report = result.scalar_one()
+    await refresh_stale_calculations(session, [report])
+    return report
 
 # ===== Админ-маршруты =====
-@router.get("/admin/reports", response_model=list[ReportOut])
+@router.get("/admin/reports", response_model=Page[ReportOut])
 async def get_all_reports(
-    admin: User = Depends(get_admin_user),
+    page: PageParams = Depends(page_params),
+    admin: Principal = Depends(get_admin_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    result = await session.execute(select(Report))
-    return result.scalars().all()
+    query = select(Report).options(*loader_options(ReportOut))
+    page_out = await paginate(session, query, Report.created_at, Report.id, page)
+    mark_stale_calculations(page_out["items"])
+    return page_out
 
 @router.get("/admin/users")
 async def get_all_users(
-    admin: User = Depends(get_admin_user),
+    admin: Principal = Depends(get_admin_user),
     session: AsyncSession = Depends(get_async_session)
 ):
     result = await session.execute(select(User))
     users = result.scalars().all()
     return [{"id": u.id, "email": u.email, "is_admin": u.is_admin} for u in users]
 
+@router.get("/admin/calculation-cache")
+async def get_calculation_cache_stats(admin: Principal = Depends(get_admin_user)):
+    return calculation_cache_stats()
+
+@router.get("/admin/password-hashing")
+async def get_password_hashing_stats(admin: Principal = Depends(get_admin_user)):
+    return password_hash_pool.stats()
+
+@router.get("/admin/db-pool")
+async def get_db_pool_stats(admin: Principal = Depends(get_admin_user)):
+    return pool_stats()
+
+@router.get("/admin/slow-queries")
+async def get_slow_queries(admin: Principal = Depends(get_admin_user)):
+    """Последние медленные запросы этого воркера с планами выполнения, если они были сняты"""
+    return slow_query_log.stats()
+
+@router.get("/admin/export")
+async def export_reports(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    location_id: Optional[UUID] = None,
+    admin: Principal = Depends(get_admin_user)
+):
+    """Потоковая выгрузка отчётов с состоянием скважины и расчётами; память не зависит от размера таблицы"""
+    query = (
+        select(
+            Report.id.label("report_id"),
+            Report.title,
+            Report.created_at,
+            Report.created_by,
+            Location.name.label("location_name"),
+            Cluster.name.label("cluster_name"),
+            Well.name.label("well_name"),
+            WellState.id.label("well_state_id"),
+            WellState.date_created.label("well_state_date"),
+            WellState.depth,
+            WellState.pressure,
+            ReportCalculated.effective_pressure,
+            ReportCalculated.required_charges,
+            ReportCalculated.gas_volume,
+            ReportCalculated.impact_duration,
+        )
+        .join(WellState, WellState.id == Report.well_state_id)
+        .join(Well, Well.id == WellState.well_id)
+        .join(Cluster, Cluster.id == Well.cluster_id)
+        .join(Location, Location.id == Cluster.location_id)
+        .outerjoin(ReportCalculated, ReportCalculated.id == Report.calculated_id)
+        .order_by(Report.created_at, Report.id)
+    )
+    if date_from:
+        query = query.where(Report.created_at >= date_from)
+    if date_to:
+        query = query.where(Report.created_at <= date_to)
+    if location_id:
+        query = query.where(Cluster.location_id == location_id)
+
+    if format == "csv":
+        return StreamingResponse(
+            csv_chunks(query),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="reports.csv"'},
+        )
+    return StreamingResponse(ndjson_chunks(query), media_type="application/x-ndjson")
+
 # ===== Далее обычные маршруты =====
 
-@router.get("/", response_model=list[ReportOut])
+@router.get("/", response_model=Page[ReportOut])
 async def get_user_reports(
     search: str = None,
     date_from: str = None,
     date_to: str = None,
-    current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
 ):
     query = select(Report).join(UserReportPermission).where(
         UserReportPermission.user_id == current_user.id
-    )
-
-    if search:
-        query = query.where(
-            or_(
-                Report.location_name.ilike(f"%{search}%"),
-                Report.cluster_name.ilike(f"%{search}%"),
-                Report.well_name.ilike(f"%{search}%")
-            )
-        )
+    ).options(*loader_options(ReportOut))
 
     if date_from:
         query = query.where(Report.created_at >= date_from)
     if date_to:
         query = query.where(Report.created_at <= date_to)
 
-    result = await session.execute(query)
-    reports = result.scalars().unique().all()
-    return reports
+    if search:
+        # Поиск по триграммному индексу search_text: лучшие совпадения первыми, одна страница без курсора
+        term = search.lower()
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rank = func.word_similarity(term, Report.search_text)
+        query = (
+            query.where(Report.search_text.ilike(pattern))
+            .order_by(rank.desc(), Report.created_at.desc(), Report.id)
+            .limit(page.limit)
+        )
+        result = await session.execute(query)
+        page_out = {"items": result.scalars().unique().all(), "next_cursor": None}
+    else:
+        page_out = await paginate(session, query, Report.created_at, Report.id, page)
+
+    # Чтение ничего не пересчитывает: устаревшие результаты только отмечаются, их пересчитает фоновая задача
+    mark_stale_calculations(page_out["items"])
+    return page_out
 
 
 @router.post("/apply", response_model=ReportOut)
 async def apply_report(
     data: ReportApplyData,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    # 1. Получаем последнее состояние скважины
+    # Входы, которые нельзя посчитать или сохранить, и права на обновляемый отчёт проверяются до любых записей
+    error = input_errors([data.depth], [data.pressure])[0]
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+    if data.report_uuid:
+        access = await authorize_report(session, data.report_uuid, current_user.id, "edit")
+
+    # 1. Получаем последнее состояние скважины по указателю Well.current_state_id
     result = await session.execute(
         select(WellState)
-        .where(WellState.well_id == data.well_id)
-        .order_by(WellState.date_created.desc())
+        .join(Well, Well.current_state_id == WellState.id)
+        .where(Well.id == data.well_id)
     )
-    latest_state = result.scalars().first()
+    latest_state = result.scalar_one_or_none()
 
     # 2. Проверяем, нужно ли новое состояние скважины
     create_new_state = (
@@ -101,7 +200,6 @@ async def apply_report(
         # 3. Если данные изменились, создаём новое состояние скважины
         new_state = WellState(
             well_id=data.well_id,
-            user_id=current_user.id,
             depth=data.depth,
             pressure=data.pressure
         )
@@ -112,13 +210,18 @@ async def apply_report(
         # 4. Если данные не изменились, используем последнее состояние
         well_state_id = latest_state.id
 
+    # Результат расчёта общий для всех отчётов с этим состоянием: для неизменного состояния
+    # он уже есть и только читается, новый считается и вставляется один раз
+    calculations = await calculations_for_states(session, {well_state_id: (data.depth, data.pressure)})
+    calc = calculations[well_state_id]
+
     # 5. Создание нового отчёта
     if not data.report_uuid:
         new_report = Report(
             title=data.title,
-            uuid=uuid4(),
-            user_id=current_user.id,
+            created_by=current_user.id,
             well_state_id=well_state_id,
+            calculated_id=calc.id,
             created_at=datetime.utcnow()
         )
         session.add(new_report)
@@ -135,41 +238,138 @@ async def apply_report(
 
     # 6. Обновление существующего отчёта
     else:
-        result = await session.execute(
-            select(Report).where(Report.uuid == data.report_uuid)
-        )
-        report = result.scalars().first()
-        if not report:
-            raise HTTPException(status_code=404, detail="Отчёт не найден")
-
-        permission_q = await session.execute(
-            select(UserReportPermission).where(
-                (UserReportPermission.user_id == current_user.id) &
-                (UserReportPermission.report_id == report.id)
-            )
-        )
-        permission = permission_q.scalar_one_or_none()
-        if not permission or not permission.can_edit:
-            raise HTTPException(status_code=403, detail="Нет прав на редактирование отчёта")
-
+        report = access.report
         report.title = data.title
         report.well_state_id = well_state_id
+        report.calculated_id = calc.id
+
+    await session.commit()
+    return await _load_report_out(session, report.id)
+
 
-        # Удаляем старые расчёты
-        await session.execute(
-            delete(ReportCalculated).where(ReportCalculated.report_id == report.id)
+@router.post("/apply-batch", response_model=list[ReportApplyResult])
+async def apply_reports_batch(
+    items: list[ReportApplyData],
+    current_user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Пакетный вариант /apply: все скважины обрабатываются в одной транзакции с постоянным числом запросов.
+    Ошибки отдельных элементов не прерывают пакет и возвращаются в результатах.
+    """
+    results: list[ReportApplyResult] = [None] * len(items)
+    if not items:
+        return results
+
+    # 1. Существующие скважины и их последние состояния — одним запросом по Well.current_state_id
+    result = await session.execute(
+        select(Well.id, WellState.id, WellState.depth, WellState.pressure)
+        .outerjoin(WellState, WellState.id == Well.current_state_id)
+        .where(Well.id.in_({item.well_id for item in items}))
+    )
+    latest_states = {well_id: (state_id, depth, pressure) for well_id, state_id, depth, pressure in result}
+
+    # 2. Обновляемые отчёты вместе с правами текущего пользователя
+    report_ids = {item.report_uuid for item in items if item.report_uuid}
+    editable_reports = {}
+    if report_ids:
+        result = await session.execute(
+            select(Report.id, UserReportPermission.can_edit)
+            .outerjoin(
+                UserReportPermission,
+                (UserReportPermission.report_id == Report.id) & (UserReportPermission.user_id == current_user.id)
+            )
+            .where(Report.id.in_(report_ids))
         )
+        editable_reports = {report_id: bool(can_edit) for report_id, can_edit in result}
+
+    # 3. Раскладываем элементы по строкам для массовой вставки
+    state_rows, report_rows, report_updates, permission_rows = [], [], [], []
+    applied = []  # (index, report_id, well_state_id, depth, pressure)
+    seen_reports = set()
+    calculation_errors = input_errors([item.depth for item in items], [item.pressure for item in items])
+    for index, item in enumerate(items):
+        error = None
+        if item.well_id not in latest_states:
+            error = "Скважина не найдена"
+        elif item.report_uuid and item.report_uuid not in editable_reports:
+            error = "Отчёт не найден"
+        elif item.report_uuid and not editable_reports[item.report_uuid]:
+            error = "Нет прав на редактирование отчёта"
+        elif item.report_uuid in seen_reports:
+            error = "Отчёт уже присутствует в пакете"
+        elif calculation_errors[index]:
+            error = calculation_errors[index]
+        if error:
+            results[index] = ReportApplyResult(index=index, well_id=item.well_id, ok=False, error=error)
+            continue
+
+        # Новое состояние создаётся только если данные отличаются от последнего
+        state_id, depth, pressure = latest_states[item.well_id]
+        if state_id is None or depth != item.depth or pressure != item.pressure:
+            state_id = uuid4()
+            state_rows.append({
+                "id": state_id,
+                "well_id": item.well_id,
+                "depth": item.depth,
+                "pressure": item.pressure,
+                "date_created": datetime.utcnow(),
+            })
+            latest_states[item.well_id] = (state_id, item.depth, item.pressure)
+
+        if item.report_uuid:
+            report_id = item.report_uuid
+            seen_reports.add(report_id)
+            report_updates.append({"id": report_id, "title": item.title, "well_state_id": state_id})
+        else:
+            report_id = uuid4()
+            report_rows.append({
+                "id": report_id,
+                "title": item.title,
+                "created_by": current_user.id,
+                "well_state_id": state_id,
+                "created_at": datetime.utcnow(),
+            })
+            permission_rows.append({
+                "user_id": current_user.id,
+                "report_id": report_id,
+                "is_owner": True,
+                "can_edit": True,
+            })
+        applied.append((index, report_id, state_id, item.depth, item.pressure))
+
+    if not applied:
+        return results
+
+    # 4. Новые состояния, затем результаты расчёта: уже посчитанные для состояний читаются,
+    # недостающие считаются векторно (повторяющиеся входы берутся из кэша) и вставляются по одному на состояние
+    if state_rows:
+        await session.execute(insert(WellState).returning(WellState.id, sort_by_parameter_order=True), state_rows)
+    calculations = await calculations_for_states(
+        session, {state_id: (depth, pressure) for _, _, state_id, depth, pressure in applied}
+    )
 
-    # 7. Выполняем расчёты
-    well_state = await session.get(WellState, well_state_id)
-    calc = calculate_from_well_state(well_state)
-    calc.report_id = report.id
-    session.add(calc)
-    report.calculated = calc
+    # 5. Отчёты ссылаются на общий результат своего состояния
+    for row in report_rows + report_updates:
+        row["calculated_id"] = calculations[row["well_state_id"]].id
+    if report_rows:
+        await session.execute(insert(Report).returning(Report.id, sort_by_parameter_order=True), report_rows)
+        await session.execute(insert(UserReportPermission), permission_rows)
+    if report_updates:
+        await session.execute(update(Report), report_updates)
+
+    for index, report_id, state_id, _, _ in applied:
+        results[index] = ReportApplyResult(
+            index=index,
+            well_id=items[index].well_id,
+            ok=True,
+            report_id=report_id,
+            well_state_id=state_id,
+            calculated=ReportCalculatedRead.model_validate(calculations[state_id]),
+        )
 
     await session.commit()
-    await session.refresh(report)
-    return report
+    return results
 
 
 # @router.post("/", response_model=ReportOut)
@@ -209,8 +409,7 @@ async def apply_report(
 #     )
 #     session.add(permission)
 #     await session.commit()
-#     await session.refresh(new_report)
-#     return new_report
+# #     return new_report
 
 # @router.get("/{report_uuid}", response_model=ReportOut)
 # async def get_report_by_uuid(
@@ -288,88 +487,120 @@ async def apply_report(
 #     return report
 
 
+async def _copy_reports(session: AsyncSession, report_ids: list[UUID], user_id: UUID) -> dict[UUID, UUID]:
+    """
+    Копирует доступные пользователю отчёты одним выражением INSERT ... SELECT ... RETURNING:
+    копия получает название, состояние скважины и ссылку на общий результат расчёта оригинала,
+    а пользователь — права владельца на неё. Возвращает {id оригинала: id копии}; недоступные отчёты пропускаются.
+    """
+    source = (
+        select(
+            Report.id.label("source_id"),
+            func.gen_random_uuid().label("id"),
+            Report.title,
+            Report.well_state_id,
+            Report.calculated_id,
+        )
+        .where(
+            Report.id.in_(report_ids),
+            exists().where(UserReportPermission.report_id == Report.id, UserReportPermission.user_id == user_id),
+        )
+        .cte("source")
+    )
+    copied = (
+        insert(Report)
+        .from_select(
+            ["id", "title", "well_state_id", "calculated_id", "created_by", "created_at"],
+            select(
+                source.c.id,
+                source.c.title,
+                source.c.well_state_id,
+                source.c.calculated_id,
+                literal(user_id, Report.created_by.type),
+                literal(datetime.utcnow(), Report.created_at.type),
+            ),
+        )
+        .returning(Report.id)
+        .cte("copied")
+    )
+    granted = (
+        insert(UserReportPermission)
+        .from_select(
+            ["id", "user_id", "report_id", "is_owner", "can_edit"],
+            select(
+                func.gen_random_uuid(), literal(user_id, UserReportPermission.user_id.type), copied.c.id, true(), true()
+            ),
+        )
+        .returning(UserReportPermission.report_id)
+        .cte("granted")
+    )
+    result = await session.execute(
+        select(source.c.source_id, granted.c.report_id).join(granted, granted.c.report_id == source.c.id)
+    )
+    return dict(result.all())
+
+
 @router.post("/{report_uuid}/copy", response_model=ReportOut)
 async def copy_report(
     report_uuid: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    result = await session.execute(
-        select(Report)
-        .join(UserReportPermission)
-        .where(
-            Report.uuid == report_uuid,
-            UserReportPermission.user_id == current_user.id
-        )
-    )
-    original = result.scalars().first()
-    if not original:
+    copies = await _copy_reports(session, [report_uuid], current_user.id)
+    if not copies:
         raise HTTPException(status_code=404, detail="Отчёт не найден или нет доступа")
-
-    copied_data = {key: getattr(original, key) for key in ReportCreate.__annotations__.keys()}
-    new_report = Report(**copied_data, user_id=current_user.id, uuid=uuid4())
-    session.add(new_report)
     await session.commit()
-    await session.refresh(new_report)
+    return await _load_report_out(session, copies[report_uuid])
 
-    new_permission = UserReportPermission(
-        user_id=current_user.id,
-        report_id=new_report.id,
-        is_owner=True
-    )
-    session.add(new_permission)
+
+@router.post("/copy-batch", response_model=list[ReportOut])
+async def copy_reports_batch(
+    report_ids: list[UUID],
+    current_user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Пакетный вариант /{report_uuid}/copy: все отчёты копируются одним выражением в одной транзакции.
+    Если хотя бы один отчёт недоступен, ничего не копируется. Копии возвращаются в порядке входного списка.
+    """
+    report_ids = list(dict.fromkeys(report_ids))
+    if not report_ids:
+        return []
+    copies = await _copy_reports(session, report_ids, current_user.id)
+    missing = [str(report_id) for report_id in report_ids if report_id not in copies]
+    if missing:
+        await session.rollback()
+        raise HTTPException(status_code=404, detail=f"Отчёты не найдены или нет доступа: {', '.join(missing)}")
     await session.commit()
 
-    return new_report
+    result = await session.execute(
+        select(Report).options(*loader_options(ReportOut)).where(Report.id.in_(list(copies.values())))
+    )
+    reports = {report.id: report for report in result.scalars().unique()}
+    ordered = [reports[copies[report_id]] for report_id in report_ids]
+    await refresh_stale_calculations(session, ordered)
+    return ordered
 
 
 @router.post("/{report_uuid}/share")
 async def share_report(
     report_uuid: UUID,
     user_email: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    # Проверка, что текущий пользователь — владелец отчёта
-    result = await session.execute(
-        select(Report)
-        .join(UserReportPermission)
-        .where(
-            Report.uuid == report_uuid,
-            UserReportPermission.user_id == current_user.id,
-            UserReportPermission.is_owner == True
-        )
-    )
-    report = result.scalars().first()
-    if not report:
-        raise HTTPException(status_code=403, detail="Нет прав на управление доступом")
+    # Отчёт, права текущего пользователя и пользователь по email — одним запросом
+    access = await authorize_report(session, report_uuid, current_user.id, "owner", target_email=user_email)
 
-    # Найти пользователя по email
+    # Повторную выдачу отсекает уникальность (user_id, report_id): вставки не будет, RETURNING пуст
     result = await session.execute(
-        select(User).where(User.email == user_email)
+        pg_insert(UserReportPermission)
+        .values(id=uuid4(), user_id=access.target_user_id, report_id=report_uuid, is_owner=False, can_edit=False)
+        .on_conflict_do_nothing(index_elements=[UserReportPermission.user_id, UserReportPermission.report_id])
+        .returning(UserReportPermission.id)
     )
-    target_user = result.scalars().first()
-    if not target_user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
-
-    # Проверить, нет ли уже разрешения
-    result = await session.execute(
-        select(UserReportPermission).where(
-            UserReportPermission.user_id == target_user.id,
-            UserReportPermission.report_id == report.id
-        )
-    )
-    existing = result.scalars().first()
-    if existing:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=400, detail="У пользователя уже есть доступ")
-
-    # Создать разрешение
-    permission = UserReportPermission(
-        user_id=target_user.id,
-        report_id=report.id,
-        is_owner=False
-    )
-    session.add(permission)
     await session.commit()
 
     return {"message": f"Доступ предоставлен пользователю {user_email}"}
@@ -377,23 +608,19 @@ async def share_report(
 @router.delete("/{report_uuid}")
 async def delete_report(
     report_uuid: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    result = await session.execute(
-        select(Report)
-        .join(UserReportPermission)
-        .where(
-            Report.uuid == report_uuid,
-            UserReportPermission.user_id == current_user.id,
-            UserReportPermission.is_owner == True
-        )
+    await authorize_report(session, report_uuid, current_user.id, "owner")
+
+    # Права на отчёт и сам отчёт удаляются одним выражением
+    permissions = (
+        delete(UserReportPermission)
+        .where(UserReportPermission.report_id == report_uuid)
+        .returning(UserReportPermission.id)
+        .cte("deleted_permissions")
     )
-    report = result.scalars().first()
-    if not report:
-        raise HTTPException(status_code=403, detail="Вы не владелец отчёта или он не найден")
-
-    await session.delete(report)
+    await session.execute(delete(Report).where(Report.id == report_uuid).add_cte(permissions))
     await session.commit()
     return {"message": "Отчёт удалён"}
 
@@ -402,38 +629,20 @@ async def delete_report(
 async def revoke_access(
     report_uuid: UUID,
     user_email: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session)
 ):
-    # Проверка, что текущий пользователь — владелец отчёта
-    result = await session.execute(
-        select(Report).join(UserReportPermission).where(
-            Report.uuid == report_uuid,
-            UserReportPermission.user_id == current_user.id,
-            UserReportPermission.is_owner == True
-        )
-    )
-    report = result.scalars().first()
-    if not report:
-        raise HTTPException(status_code=403, detail="Нет прав на управление доступом")
-
-    # Найти пользователя по email
-    result = await session.execute(select(User).where(User.email == user_email))
-    target_user = result.scalars().first()
-    if not target_user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    access = await authorize_report(session, report_uuid, current_user.id, "owner", target_email=user_email)
 
-    # Удалить разрешение, если оно существует
     result = await session.execute(
-        select(UserReportPermission).where(
-            UserReportPermission.user_id == target_user.id,
-            UserReportPermission.report_id == report.id
+        delete(UserReportPermission)
+        .where(
+            UserReportPermission.user_id == access.target_user_id,
+            UserReportPermission.report_id == report_uuid
         )
+        .returning(UserReportPermission.id)
     )
-    permission = result.scalars().first()
-    if not permission:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="У пользователя нет доступа к отчёту")
-
-    await session.delete(permission)
     await session.commit()
     return {"message": f"Доступ пользователя {user_email} отозван"}
@@ -1,31 +1,163 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import csv
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, cast
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc, func
 from uuid import UUID
-from typing import Union
+from typing import Literal, Optional, Union
 
 from my_app_api.database import get_async_session
-from my_app_api.models.models import WellState
-from my_app_api.schemas.schemas import WellStateCreate, WellStateOut
+from my_app_api.models.models import Cluster, Well, WellState
+from my_app_api.schemas.schemas import Page, WellStateCreate, WellStateImportResult, WellStateOut
+from my_app_api.settings import get_settings
+from my_app_api.utils.export import ARROW_MEDIA_TYPES, ArrowFormat, arrow_chunks, partitioned_arrow_chunks
+from my_app_api.utils.pagination import PageParams, page_params, paginate
+from my_app_api.utils.well_state_import import WellDirectory, copy_well_states, parse_rows
 
 router = APIRouter(prefix="/well-states", tags=["Состояния скважин"])
+settings = get_settings()
 
-@router.get("/", response_model=list[WellStateOut])
+@router.get("/", response_model=Page[WellStateOut])
 async def get_well_states(
     well_id: Union[UUID, None] = Query(None), #Вернёт все состояния только для указанной скважины
     latest: bool = Query(False), #Работает вместе с well_id — вернёт только последнее (по дате) состояние скважины
+    page: PageParams = Depends(page_params),
     session: AsyncSession = Depends(get_async_session)
 ):
     query = select(WellState)
     if well_id:
-        query = query.where(WellState.well_id == well_id)
         if latest:
-            query = query.order_by(desc(WellState.date_created)).limit(1)
+            query = query.join(Well, Well.current_state_id == WellState.id)
+            query = query.where(Well.id == well_id)
+        else:
+            query = query.where(WellState.well_id == well_id)
+    return await paginate(session, query, WellState.date_created, WellState.id, page)
+
+
+@router.get("/latest", response_model=list[WellStateOut])
+async def get_latest_well_states(
+    cluster_id: Union[UUID, None] = Query(None), #Ограничить выборку скважинами куста
+    location_id: Union[UUID, None] = Query(None), #Ограничить выборку скважинами месторождения
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Последние состояния всех скважин одним запросом (по указателю Well.current_state_id)"""
+    query = select(WellState).join(Well, Well.current_state_id == WellState.id)
+    if cluster_id:
+        query = query.where(Well.cluster_id == cluster_id)
+    if location_id:
+        query = query.join(Cluster, Cluster.id == Well.cluster_id).where(Cluster.location_id == location_id)
     result = await session.execute(query)
     return result.scalars().all()
 
 
+# Колонки, доступные для выгрузки; UUID приводятся к строке на стороне БД
+EXPORT_COLUMNS = {
+    "id": cast(WellState.id, String).label("id"),
+    "well_id": cast(WellState.well_id, String).label("well_id"),
+    "date_created": WellState.date_created,
+    "depth": WellState.depth,
+    "pressure": WellState.pressure,
+}
+EXPORT_DEFAULT_COLUMNS = ["well_id", "date_created", "depth", "pressure"]
+PARTITION_COLUMNS = {
+    "location_id": cast(Cluster.location_id, String).label("location_id"),
+    "cluster_id": cast(Well.cluster_id, String).label("cluster_id"),
+}
+
+
+@router.get("/export")
+async def export_well_states(
+    format: ArrowFormat = "parquet",
+    columns: Optional[list[Literal["id", "well_id", "date_created", "depth", "pressure"]]] = Query(None),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    well_id: Optional[UUID] = None,
+    cluster_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    partition_by: list[Literal["location_id", "cluster_id"]] = Query([]), #Файлы (zip) по месторождениям/кустам
+):
+    """
+    Колоночная выгрузка истории состояний скважин в Parquet или Arrow IPC.
+    Проекция и фильтры выполняются в БД, данные читаются курсором и пишутся порциями (record batch).
+    """
+    columns = list(dict.fromkeys(columns or EXPORT_DEFAULT_COLUMNS))
+    partition_by = [name for name in PARTITION_COLUMNS if name in partition_by]
+
+    query = select(*(PARTITION_COLUMNS[name] for name in partition_by), *(EXPORT_COLUMNS[name] for name in columns))
+    if partition_by or cluster_id or location_id:
+        query = query.select_from(WellState).join(Well, Well.id == WellState.well_id)
+    if "location_id" in partition_by or location_id:
+        query = query.join(Cluster, Cluster.id == Well.cluster_id)
+    if date_from:
+        query = query.where(WellState.date_created >= date_from)
+    if date_to:
+        query = query.where(WellState.date_created <= date_to)
+    if well_id:
+        query = query.where(WellState.well_id == well_id)
+    if cluster_id:
+        query = query.where(Well.cluster_id == cluster_id)
+    if location_id:
+        query = query.where(Cluster.location_id == location_id)
+    query = query.order_by(*(PARTITION_COLUMNS[name] for name in partition_by), WellState.date_created, WellState.id)
+
+    if partition_by:
+        return StreamingResponse(
+            partitioned_arrow_chunks(query, format, partition_by),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="well_states.zip"'},
+        )
+    return StreamingResponse(
+        arrow_chunks(query, format),
+        media_type=ARROW_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="well_states.{format}"'},
+    )
+
+
+@router.post("/import", response_model=WellStateImportResult)
+async def import_well_states(
+    file: UploadFile = File(...),
+    delimiter: Literal[",", ";", "\t"] = ",",
+    cluster_id: Optional[UUID] = None, #Искать скважины по имени только в этом кусте
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Массовая загрузка замеров из CSV (колонки well или well_id, depth, pressure, date_created).
+    Скважины сопоставляются по имени через справочник, загруженный одним запросом; корректные строки
+    загружаются через COPY порциями по IMPORT_CHUNK_SIZE, ошибочные пропускаются и перечисляются в ответе.
+    """
+    wells_query = select(Well.id, Well.name)
+    if cluster_id:
+        wells_query = wells_query.where(Well.cluster_id == cluster_id)
+    wells = WellDirectory()
+    for well_id, name in (await session.execute(wells_query)).all():
+        wells.add(well_id, name)
+
+    imported, rejected, errors, chunk = 0, 0, [], []
+    try:
+        for line, record, error in parse_rows(file.file, wells, delimiter):
+            if error:
+                rejected += 1
+                if len(errors) < settings.IMPORT_MAX_ERRORS:
+                    errors.append({"row": line, "error": error})
+                continue
+            chunk.append(record)
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                await copy_well_states(session, chunk)
+                imported += len(chunk)
+                chunk = []
+    except (ValueError, UnicodeDecodeError, csv.Error) as error:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail=f"Не удалось прочитать CSV: {error}")
+    if chunk:
+        await copy_well_states(session, chunk)
+        imported += len(chunk)
+
+    await session.commit()
+    return {"imported": imported, "rejected": rejected, "errors": errors}
+
+
 @router.post("/", response_model=WellStateOut)
 async def create_well_state(well_state: WellStateCreate, session: AsyncSession = Depends(get_async_session)):
     new_state = WellState(**well_state.dict())
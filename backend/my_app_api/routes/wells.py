@@ -4,14 +4,19 @@ from sqlalchemy.future import select
 
 from my_app_api.database import get_async_session
 from my_app_api.models.models import Well
-from my_app_api.schemas.schemas import WellCreate, WellOut
+from my_app_api.schemas.schemas import WellCreate, WellOut, Page
+from my_app_api.utils.conditional import conditional_get, mark_modified
+from my_app_api.utils.hierarchy import invalidate_hierarchy
+from my_app_api.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter(prefix="/wells", tags=["Скважины"])
 
-@router.get("/", response_model=list[WellOut])
-async def get_wells(session: AsyncSession = Depends(get_async_session)):
-    result = await session.execute(select(Well))
-    return result.scalars().all()
+@router.get("/", response_model=Page[WellOut], dependencies=[Depends(conditional_get("wells"))])
+async def get_wells(
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session)
+):
+    return await paginate(session, select(Well), Well.created_at, Well.id, page)
 
 
 @router.post("/", response_model=WellOut)
@@ -19,5 +24,7 @@ async def create_well(well: WellCreate, session: AsyncSession = Depends(get_asyn
     new_well = Well(**well.dict())
     session.add(new_well)
     await session.commit()
+    invalidate_hierarchy()
+    mark_modified("wells")
     await session.refresh(new_well)
     return new_well
@@ -1,10 +1,22 @@
 
-from pydantic import BaseModel, EmailStr, UUID4, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr, UUID4, Field
+from typing import Generic, Optional, List, TypeVar
 from datetime import datetime
 from .report_calculated import ReportCalculatedRead
 
 
+T = TypeVar("T")
+
+
+# -------------------------------
+# Pagination Schemas
+# -------------------------------
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None  # Передаётся в параметр cursor для получения следующей страницы
+
+
 # -------------------------------
 # User Schemas
 # -------------------------------
@@ -72,6 +84,27 @@ class WellOut(WellBase):
     id: UUID4
 
 
+# -------------------------------
+# Hierarchy Schemas
+# -------------------------------
+
+class HierarchyWell(BaseModel):
+    id: UUID4
+    name: str
+
+
+class HierarchyCluster(BaseModel):
+    id: UUID4
+    name: str
+    wells: List[HierarchyWell]
+
+
+class HierarchyLocation(BaseModel):
+    id: UUID4
+    name: str
+    clusters: List[HierarchyCluster]
+
+
 # -------------------------------
 # WellState Schemas
 # -------------------------------
@@ -84,7 +117,8 @@ class WellStateBase(BaseModel):
 
 
 class WellStateCreate(WellStateBase):
-    pass
+    # NaN и бесконечности расчёт не принимает
+    model_config = ConfigDict(allow_inf_nan=False)
 
 
 class WellStateOut(WellStateBase):
@@ -92,6 +126,17 @@ class WellStateOut(WellStateBase):
     date_created: datetime
 
 
+class WellStateImportError(BaseModel):
+    row: int  # Номер строки в CSV (заголовок — строка 1)
+    error: str
+
+
+class WellStateImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[WellStateImportError]  # Не более IMPORT_MAX_ERRORS первых ошибок
+
+
 # -------------------------------
 # Report Schemas
 # -------------------------------
@@ -110,6 +155,28 @@ class ReportOut(ReportBase):
     created_by: UUID4
     created_at: datetime
     calculated: Optional[ReportCalculatedRead]
+    calculation_stale: bool = False  # Расчёт другой версии формул или другого состояния, ждёт фонового пересчёта
+
+
+class ReportApplyData(BaseModel):
+    well_id: UUID4
+    depth: Optional[float]
+    pressure: Optional[float]
+    title: Optional[str]
+    report_uuid: Optional[UUID4] = None  # Если указан — обновляется существующий отчёт
+
+    # NaN и бесконечности расчёт не принимает
+    model_config = ConfigDict(allow_inf_nan=False)
+
+
+class ReportApplyResult(BaseModel):
+    index: int  # Позиция элемента во входном списке
+    well_id: UUID4
+    ok: bool
+    report_id: Optional[UUID4] = None
+    well_state_id: Optional[UUID4] = None
+    calculated: Optional[ReportCalculatedRead] = None
+    error: Optional[str] = None
 
 
 
@@ -131,3 +198,22 @@ class UserReportPermissionCreate(UserReportPermissionBase):
 class UserReportPermissionOut(UserReportPermissionBase):
     id: UUID4
 
+
+# -------------------------------
+# Job Schemas
+# -------------------------------
+
+class JobOut(BaseModel):
+    id: UUID4
+    kind: str
+    status: str
+    total: int
+    processed: int
+    rate_per_second: Optional[float] = None  # Записей в секунду с момента первого запуска
+    eta_seconds: Optional[float] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
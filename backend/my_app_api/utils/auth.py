@@ -1,8 +1,25 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+from typing import Callable, Optional
+from uuid import UUID
+import asyncio
 import os
+import time
+
+from my_app_api.database import get_async_session
+from my_app_api.exceptions import PasswordHashingBusyError
+from my_app_api.models.models import User
+from my_app_api.settings import get_settings
+from my_app_api.utils.cache import TTLCache
 
 # Загрузка настроек напрямую из окружения
 SECRET_KEY = os.getenv("SECRET_KEY", "secret")
@@ -21,6 +38,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHashPool:
+    """
+    Отдельный ограниченный пул потоков для bcrypt, чтобы хеширование не блокировало event loop.
+    Если задач в очереди больше max_pending, новые сразу отклоняются с PasswordHashingBusyError.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    async def run(self, func: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashingBusyError()
+
+        self.pending += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            return func(*args), started_at, time.perf_counter()
+
+        try:
+            result, started_at, finished_at = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+
+        wait = started_at - submitted_at
+        self.completed += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.run_seconds_total += finished_at - started_at
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_avg": self.wait_seconds_total / self.completed if self.completed else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+            "run_seconds_avg": self.run_seconds_total / self.completed if self.completed else 0.0,
+        }
+
+
+settings = get_settings()
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hash_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -35,3 +118,97 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+# ===== Текущий пользователь =====
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Неизменяемое представление пользователя, достаточное для проверок доступа"""
+
+    id: UUID
+    email: str
+    is_admin: bool
+
+
+# Токен -> (поколение пользователей, Principal). Запись живёт не дольше срока действия токена и AUTH_CACHE_TTL.
+# Поколение растёт только при изменениях через ORM в этом процессе; удаление пользователя в другом воркере
+# или вне приложения видно не дольше AUTH_CACHE_TTL. Права администратора проверяет get_admin_user по БД
+_principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+# Увеличивается при изменении любого пользователя; записи кэша со старым поколением считаются устаревшими
+_users_generation = 0
+
+
+def invalidate_principals() -> None:
+    global _users_generation
+    _users_generation += 1
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session)
+) -> Principal:
+    cached = _principal_cache.get(token)
+    if cached is not None:
+        generation, principal = cached
+        if generation == _users_generation:
+            return principal
+
+    payload = decode_access_token(token)
+    if not payload or payload.get("exp") is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    # Поколение запоминается до запроса: изменение пользователя во время ожидания БД не попадёт в кэш как актуальное
+    generation = _users_generation
+    result = await session.execute(
+        select(User.id, User.email, User.is_admin).where(User.email == payload.get("sub"))
+    )
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    principal = Principal(id=row.id, email=row.email, is_admin=bool(row.is_admin))
+    _principal_cache.set(token, (generation, principal), ttl=payload["exp"] - time.time())
+    return principal
+
+
+async def get_admin_user(
+    current_user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+) -> Principal:
+    """
+    Флаг администратора перечитывается из БД на каждый запрос: его меняют вне приложения (SQL, миграции),
+    и такие изменения не сбрасывают кэш пользователей. Для остальных маршрутов кэш остаётся в силе.
+    """
+    is_admin = await session.scalar(select(User.is_admin).where(User.id == current_user.id))
+    if bool(is_admin) != current_user.is_admin:
+        invalidate_principals()
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return current_user
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    """Запоминает пользователей, у которых изменился флаг администратора или которые удалены"""
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.is_admin.history.has_changes():
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    if session.info.pop("changed_user_ids", None):
+        invalidate_principals()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
@@ -1,21 +1,325 @@
-from my_app_api.models.models import ReportCalculated, WellState
+import math
+import time
+from typing import NamedTuple, Optional, Sequence, Union
+from uuid import UUID, uuid4
 
-def calculate_from_well_state(well_state: WellState) -> ReportCalculated:
+import numpy as np
+from sqlalchemy import delete, exists, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm.attributes import set_committed_value
+
+from my_app_api.models.models import Report, ReportCalculated, WellState
+from my_app_api.settings import get_settings
+from my_app_api.utils.cache import TTLCache
+from my_app_api.utils.metrics import calculation_duration, calculation_rows
+
+
+ArrayLike = Union[np.ndarray, Sequence[Union[float, None]]]
+
+# Версия формул. Увеличивайте при любом изменении расчётов — закэшированные результаты сбросятся,
+# а сохранённые в report_calculated станут устаревшими (см. stale_reports_query)
+FORMULA_VERSION = "1"
+
+
+class CalculationBatch(NamedTuple):
+    """Колоночный результат расчёта: i-й элемент каждого массива относится к i-му состоянию скважины"""
+
+    effective_pressure: np.ndarray
+    required_charges: np.ndarray
+    gas_volume: np.ndarray
+    impact_duration: np.ndarray
+
+
+class CalculationValues(NamedTuple):
+    """Результат расчёта для одного состояния скважины"""
+
+    effective_pressure: float
+    required_charges: int
+    gas_volume: float
+    impact_duration: float
+
+
+# required_charges хранится в report_calculated.required_charges (Integer, int4 в PostgreSQL)
+_CHARGES_RANGE = np.iinfo(np.int32)
+_NOT_FINITE_ERROR = "depth и pressure должны быть конечными числами"
+_CHARGES_RANGE_ERROR = "required_charges выходит за пределы int32"
+
+
+def _to_float(values: ArrayLike) -> np.ndarray:
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values.astype(np.float64, copy=False)
+    return np.array([0.0 if value is None else value for value in values], dtype=np.float64)
+
+
+def _as_column(values: ArrayLike) -> np.ndarray:
     """
-    Выполняет расчёты на основе состояния скважины и возвращает объект ReportCalculated.
+    Приводит входной столбец к float64. None считается нулём, как и в скалярном расчёте (`well_state.depth or 0.0`).
+    NaN и бесконечности отклоняются: скалярный расчёт на них падал (int(nan), int(inf)) или возвращал NaN.
+    """
+    column = _to_float(values)
+    if not np.isfinite(column).all():
+        raise ValueError(_NOT_FINITE_ERROR)
+    return column
+
+
+def _required_charges(depth: np.ndarray, pressure: np.ndarray) -> np.ndarray:
+    """Число зарядов в float64; переполнение даёт inf, который затем не проходит проверку диапазона"""
+    with np.errstate(over="ignore", invalid="ignore"):
+        return np.where(pressure > 0, np.trunc(depth * pressure / 1000), 0.0)
+
+
+def _storable(charges: np.ndarray) -> np.ndarray:
+    return (charges >= _CHARGES_RANGE.min) & (charges <= _CHARGES_RANGE.max)
+
+
+def input_errors(depth: ArrayLike, pressure: ArrayLike) -> list[Optional[str]]:
+    """
+    Проверка входов без расчёта: для каждого состояния — причина, по которой calculate_batch его отклонит, или None.
+    Позволяет маршрутам ответить 422 или ошибкой элемента пакета до записи в БД.
+    """
+    depth, pressure = _to_float(depth), _to_float(pressure)
+    finite = np.isfinite(depth) & np.isfinite(pressure)
+    storable = _storable(_required_charges(depth, pressure))
+    return [
+        _NOT_FINITE_ERROR if not is_finite else None if is_storable else _CHARGES_RANGE_ERROR
+        for is_finite, is_storable in zip(finite.tolist(), storable.tolist())
+    ]
+
+
+def calculate_batch(depth: ArrayLike, pressure: ArrayLike) -> CalculationBatch:
+    """
+    Выполняет расчёты сразу для набора состояний скважин.
+    Принимает столбцы глубин и давлений одинаковой длины и возвращает столбцы расчётных полей.
     """
-    depth = well_state.depth or 0.0
-    pressure = well_state.pressure or 0.0
+    started_at = time.perf_counter()
+    depth = _as_column(depth)
+    pressure = _as_column(pressure)
+    if depth.shape != pressure.shape or depth.ndim != 1:
+        raise ValueError("depth и pressure должны быть одномерными массивами одинаковой длины")
+
+    positive = pressure > 0
 
     # Примерные расчёты — можно заменить формулами из твоей логики
-    required_charges = int((depth * pressure) / 1000) if pressure > 0 else 0
+    charges = _required_charges(depth, pressure)
+    # astype молча превращает inf и переполнение в мусор, а INSERT значения вне int4 падает
+    if not _storable(charges).all():
+        raise ValueError(_CHARGES_RANGE_ERROR)
+    required_charges = charges.astype(np.int64)
     effective_pressure = pressure * 0.9
     gas_volume = depth * 0.5
-    impact_duration = pressure / 2 if pressure > 0 else 0
+    impact_duration = np.where(positive, pressure / 2, 0.0)
 
-    return ReportCalculated(
+    calculation_duration.observe(time.perf_counter() - started_at)
+    calculation_rows.inc(len(depth))
+    return CalculationBatch(
         effective_pressure=effective_pressure,
         required_charges=required_charges,
         gas_volume=gas_volume,
-        impact_duration=impact_duration
+        impact_duration=impact_duration,
+    )
+
+
+settings = get_settings()
+_memo = TTLCache(maxsize=settings.CALC_CACHE_SIZE, ttl=settings.CALC_CACHE_TTL)
+_memo_version = FORMULA_VERSION
+_memo_invalidations = 0
+
+
+def _normalize(value: Optional[float]) -> float:
+    """
+    Приводит входное значение к виду, в котором оно участвует в расчёте (None -> 0.0, -0.0 -> 0.0).
+    NaN и бесконечности отклоняются так же, как в calculate_batch
+    """
+    if value is None:
+        return 0.0
+    if not math.isfinite(value):
+        raise ValueError("depth и pressure должны быть конечными числами")
+    return float(value) + 0.0
+
+
+def _current_memo() -> TTLCache:
+    """Возвращает кэш расчётов, сбрасывая его, если версия формул изменилась"""
+    global _memo_version, _memo_invalidations
+    if _memo_version != FORMULA_VERSION:
+        _memo.clear()
+        _memo_version = FORMULA_VERSION
+        _memo_invalidations += 1
+    return _memo
+
+
+def calculate_many(depths: Sequence[Optional[float]], pressures: Sequence[Optional[float]]) -> list[CalculationValues]:
+    """
+    Расчёт набора состояний с мемоизацией: уже посчитанные входы берутся из кэша,
+    остальные считаются одним вызовом calculate_batch.
+    """
+    memo = _current_memo()
+    keys = [(FORMULA_VERSION, _normalize(d), _normalize(p)) for d, p in zip(depths, pressures)]
+    values = [memo.get(key) for key in keys]
+
+    missing = {key: None for key, value in zip(keys, values) if value is None}
+    if missing:
+        missing_keys = list(missing)
+        batch = calculate_batch([key[1] for key in missing_keys], [key[2] for key in missing_keys])
+        for i, key in enumerate(missing_keys):
+            missing[key] = CalculationValues(
+                effective_pressure=float(batch.effective_pressure[i]),
+                required_charges=int(batch.required_charges[i]),
+                gas_volume=float(batch.gas_volume[i]),
+                impact_duration=float(batch.impact_duration[i]),
+            )
+            memo.set(key, missing[key])
+        values = [missing[key] if value is None else value for key, value in zip(keys, values)]
+
+    return values
+
+
+def calculate_values(depth: Optional[float], pressure: Optional[float]) -> CalculationValues:
+    return calculate_many([depth], [pressure])[0]
+
+
+def clear_calculation_cache() -> None:
+    _memo.clear()
+
+
+def calculation_cache_stats() -> dict:
+    return {**_memo.stats(), "formula_version": _memo_version, "invalidations": _memo_invalidations}
+
+
+def calculated_fields(depths: Sequence[Optional[float]], pressures: Sequence[Optional[float]]) -> list[dict]:
+    """Поля ReportCalculated для набора входов: результаты расчёта (через кэш) и версия формул"""
+    return [
+        {**values._asdict(), "calculation_version": FORMULA_VERSION} for values in calculate_many(depths, pressures)
+    ]
+
+
+def calculate_from_well_state(well_state: WellState) -> ReportCalculated:
+    """
+    Выполняет расчёты на основе состояния скважины и возвращает объект ReportCalculated.
+    """
+    fields = calculated_fields([well_state.depth], [well_state.pressure])[0]
+    return ReportCalculated(well_state_id=well_state.id, **fields)
+
+
+def stale_condition():
+    """Результата нет, он посчитан другой версией формул или относится к другому состоянию скважины"""
+    return or_(
+        ReportCalculated.id.is_(None),
+        ReportCalculated.calculation_version != FORMULA_VERSION,
+        ReportCalculated.well_state_id != Report.well_state_id,
+    )
+
+
+def stale_reports_query():
+    """Отчёты, чей расчёт устарел, вместе с состоянием скважины и входами для пересчёта"""
+    return (
+        select(Report.id, Report.well_state_id, WellState.depth, WellState.pressure)
+        .join(WellState, WellState.id == Report.well_state_id)
+        .outerjoin(ReportCalculated, ReportCalculated.id == Report.calculated_id)
+        .where(stale_condition())
+    )
+
+
+def upsert_calculated():
+    """
+    INSERT ... ON CONFLICT (well_state_id, calculation_version) DO UPDATE: перезаписывает результат,
+    а при параллельной вставке того же состояния RETURNING отдаёт уже существующую строку
+    """
+    statement = pg_insert(ReportCalculated)
+    return statement.on_conflict_do_update(
+        index_elements=[ReportCalculated.well_state_id, ReportCalculated.calculation_version],
+        set_={name: statement.excluded[name] for name in CalculationValues._fields},
+    )
+
+
+async def calculations_for_states(
+    session: AsyncSession, states: dict[UUID, tuple[Optional[float], Optional[float]]]
+) -> dict[UUID, ReportCalculated]:
+    """
+    Результаты текущей версии формул для состояний скважин {id: (глубина, давление)}.
+    Уже посчитанные читаются одним запросом; считаются и вставляются только недостающие.
+    """
+    if not states:
+        return {}
+    result = await session.scalars(
+        select(ReportCalculated).where(
+            ReportCalculated.well_state_id.in_(list(states)),
+            ReportCalculated.calculation_version == FORMULA_VERSION,
+        )
+    )
+    calculations = {calc.well_state_id: calc for calc in result}
+
+    missing = [state_id for state_id in states if state_id not in calculations]
+    if missing:
+        depths, pressures = zip(*(states[state_id] for state_id in missing))
+        fields = calculated_fields(depths, pressures)
+        rows = [{"id": uuid4(), "well_state_id": state_id, **values} for state_id, values in zip(missing, fields)]
+        # При конфликте с параллельной вставкой RETURNING отдаёт строку с чужим id, поэтому порядок параметров
+        # (sort_by_parameter_order сверяет его по id) не используется: строки сопоставляются по состоянию
+        result = await session.scalars(upsert_calculated().returning(ReportCalculated), rows)
+        calculations.update((calc.well_state_id, calc) for calc in result)
+    return calculations
+
+
+async def link_calculations(session: AsyncSession, report_ids: Sequence[UUID]) -> None:
+    """Направляет отчёты на результат текущей версии формул для их состояния скважины (он должен существовать)"""
+    await session.execute(
+        update(Report)
+        .where(
+            Report.id.in_(report_ids),
+            ReportCalculated.well_state_id == Report.well_state_id,
+            ReportCalculated.calculation_version == FORMULA_VERSION,
+        )
+        .values(calculated_id=ReportCalculated.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_unused_calculations(session: AsyncSession) -> int:
+    """Удаляет результаты прошлых версий формул, на которые больше не ссылается ни один отчёт"""
+    result = await session.execute(
+        delete(ReportCalculated).where(
+            ReportCalculated.calculation_version != FORMULA_VERSION,
+            ~exists().where(Report.calculated_id == ReportCalculated.id),
+        )
+    )
+    return result.rowcount
+
+
+def is_stale(report: Report) -> bool:
+    """stale_condition для загруженного отчёта (вместе с calculated)"""
+    calc = report.calculated
+    return calc is None or calc.calculation_version != FORMULA_VERSION or calc.well_state_id != report.well_state_id
+
+
+def mark_stale_calculations(reports: Sequence[Report]) -> None:
+    """
+    Для маршрутов чтения: отмечает устаревшие результаты (ReportOut.calculation_stale), ничего не пересчитывая
+    и не записывая. Пересчитывает их фоновая задача recalculate (POST /jobs/recalculate) или запись в отчёт.
+    """
+    for report in reports:
+        report.calculation_stale = is_stale(report)
+
+
+async def refresh_stale_calculations(session: AsyncSession, reports: Sequence[Report]) -> None:
+    """
+    Пересчитывает устаревшие результаты отчётов, которые только что записаны (apply, копирование).
+    Отчёты должны быть загружены вместе с well_state и calculated (см. loader_options(ReportOut)).
+    """
+    stale = [report for report in reports if is_stale(report)]
+    if not stale:
+        return
+
+    calculations = await calculations_for_states(
+        session, {report.well_state_id: (report.well_state.depth, report.well_state.pressure) for report in stale}
+    )
+    await session.execute(
+        update(Report),
+        [{"id": report.id, "calculated_id": calculations[report.well_state_id].id} for report in stale],
     )
+    for report in stale:
+        calc = calculations[report.well_state_id]
+        set_committed_value(report, "calculated_id", calc.id)
+        set_committed_value(report, "calculated", calc)
+    await session.commit()
@@ -0,0 +1,104 @@
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from my_app_api.settings import get_settings
+
+
+settings = get_settings()
+
+# Различает воркеры gunicorn: у каждого свой счётчик версий, и их ETag не должны совпадать
+_process_token = secrets.token_hex(4)
+
+
+class TableVersion:
+    """
+    Версия справочной таблицы в памяти процесса: счётчик и время последнего изменения.
+    Увеличивается эндпоинтами создания после коммита. Изменения, сделанные другими воркерами,
+    здесь не видны, поэтому версия принудительно обновляется раз в REFERENCE_CACHE_TTL секунд —
+    это и есть верхняя граница устаревания ответа 304.
+    """
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+        self.version = 0
+        self.last_modified: Optional[datetime] = None
+        self.bump()
+
+    def bump(self) -> None:
+        self.version += 1
+        # Last-Modified передаётся с точностью до секунды; при нескольких изменениях за секунду
+        # метка всё равно должна расти, иначе If-Modified-Since вернёт 304 на изменённые данные
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        previous = self.last_modified
+        self.last_modified = now if previous is None or now > previous else previous + timedelta(seconds=1)
+        self.valid_until = time.monotonic() + settings.REFERENCE_CACHE_TTL
+
+    def current(self) -> "TableVersion":
+        if self.valid_until <= time.monotonic():
+            self.bump()
+        return self
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self.table}-{_process_token}-{self.version}"'
+
+
+table_versions = {table: TableVersion(table) for table in ("locations", "clusters", "wells")}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Сравнение по правилам If-None-Match (слабое: префикс W/ не учитывается)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def conditional_get(table: str) -> Callable:
+    """
+    Зависимость для GET-маршрутов справочников: отвечает 304 по If-None-Match / If-Modified-Since
+    до обращения к БД, иначе добавляет к ответу ETag, Last-Modified и Cache-Control.
+    """
+    state = table_versions[table]
+
+    async def dependency(request: Request, response: Response) -> None:
+        version = state.current()
+        headers = {
+            "ETag": version.etag,
+            "Last-Modified": format_datetime(version.last_modified, usegmt=True),
+            "Cache-Control": f"public, max-age={settings.REFERENCE_CACHE_MAX_AGE}, must-revalidate",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        # If-Modified-Since учитывается, только если клиент не прислал If-None-Match (RFC 9110, 13.1.3)
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, version.etag.removeprefix("W/"))
+        else:
+            not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, version.last_modified)
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
+
+
+def mark_modified(table: str) -> None:
+    """Вызывается эндпоинтами создания после коммита"""
+    table_versions[table].bump()
@@ -0,0 +1,166 @@
+import csv
+import io
+import itertools
+import json
+import zipfile
+from datetime import date, datetime
+from typing import AsyncIterator, Literal, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy.sql import Select
+
+from my_app_api.database import async_session_maker
+from my_app_api.settings import get_settings
+
+
+settings = get_settings()
+
+
+async def stream_rows(query: Select, chunk_size: Optional[int] = None) -> AsyncIterator[list]:
+    """
+    Читает результат запроса серверным курсором порциями по EXPORT_CHUNK_SIZE строк.
+    Сессия открывается здесь, а не через зависимость, так как живёт столько же, сколько ответ.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    async with async_session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions():
+            yield partition
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else str(value)
+
+
+async def ndjson_chunks(query: Select) -> AsyncIterator[bytes]:
+    async for rows in stream_rows(query):
+        lines = (json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n" for row in rows)
+        yield "".join(lines).encode()
+
+
+async def csv_chunks(query: Select) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in query.selected_columns])
+    async for rows in stream_rows(query):
+        writer.writerows(row.values() for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+ArrowFormat = Literal["parquet", "arrow"]
+
+ARROW_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+_ARROW_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    datetime: pa.timestamp("us"),
+    date: pa.date32(),
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Файлоподобный приёмник без перемотки: копит записанные байты до очередной отдачи клиенту"""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def arrow_schema(query: Select, exclude: Sequence[str] = ()) -> pa.Schema:
+    """Схема Arrow по типам выбранных колонок запроса (UUID нужно заранее привести к строке в SQL)"""
+    return pa.schema(
+        [
+            pa.field(column.name, _ARROW_TYPES[column.type.python_type])
+            for column in query.selected_columns
+            if column.name not in exclude
+        ]
+    )
+
+
+def _open_writer(sink, schema: pa.Schema, format: ArrowFormat):
+    if format == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_file(sink, schema)
+
+
+def _record_batch(rows: list, schema: pa.Schema) -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict({name: [row[name] for row in rows] for name in schema.names}, schema=schema)
+
+
+async def arrow_chunks(query: Select, format: ArrowFormat) -> AsyncIterator[bytes]:
+    """
+    Выгрузка результата запроса одним файлом Parquet/Arrow.
+    Каждая порция курсора записывается отдельным record batch (в Parquet — отдельной группой строк).
+    """
+    schema = arrow_schema(query)
+    sink = _ChunkSink()
+    writer = _open_writer(sink, schema, format)
+    async for rows in stream_rows(query, settings.EXPORT_ARROW_BATCH_SIZE):
+        writer.write_batch(_record_batch(rows, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+async def partitioned_arrow_chunks(
+    query: Select, format: ArrowFormat, partition_by: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка в zip-архив с разбиением в стиле Hive: `location_id=<id>/cluster_id=<id>/part-0.parquet`.
+    Запрос должен выбирать колонки partition_by и быть отсортирован по ним в первую очередь —
+    тогда каждая партиция пишется целиком, и одновременно открыт только один файл.
+    Колонки партиционирования в сами файлы не попадают, их значения восстанавливаются из путей.
+    """
+    schema = arrow_schema(query, exclude=partition_by)
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED)
+    current_key, entry, writer = None, None, None
+
+    def partition_key(row) -> tuple:
+        return tuple(row[name] for name in partition_by)
+
+    async for rows in stream_rows(query, settings.EXPORT_ARROW_BATCH_SIZE):
+        for key, group in itertools.groupby(rows, key=partition_key):
+            if key != current_key:
+                if writer is not None:
+                    writer.close()
+                    entry.close()
+                path = "/".join(f"{name}={value}" for name, value in zip(partition_by, key))
+                entry = archive.open(f"{path}/part-0.{format}", "w", force_zip64=True)
+                writer = _open_writer(entry, schema, format)
+                current_key = key
+            writer.write_batch(_record_batch(list(group), schema))
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        entry.close()
+    archive.close()
+    yield sink.drain()
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import time
+from typing import NamedTuple, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from my_app_api.models.models import Cluster, Location, Well
+from my_app_api.schemas.schemas import HierarchyLocation
+from my_app_api.settings import get_settings
+
+
+settings = get_settings()
+_adapter = TypeAdapter(list[HierarchyLocation])
+
+
+class HierarchySnapshot(NamedTuple):
+    body: bytes  # Готовый JSON ответа
+    etag: str  # Сильный ETag — sha256 от body
+    expires_at: float
+
+
+_snapshot: Optional[HierarchySnapshot] = None
+_generation = 0  # Увеличивается при каждой инвалидации, чтобы не сохранить дерево, прочитанное до неё
+_lock = asyncio.Lock()
+
+
+def cached_hierarchy() -> Optional[HierarchySnapshot]:
+    """Актуальный снимок дерева из памяти процесса либо None"""
+    if _snapshot is not None and _snapshot.expires_at > time.monotonic():
+        return _snapshot
+    return None
+
+
+def invalidate_hierarchy() -> None:
+    """Сбрасывает кэш дерева; вызывается после коммита создания месторождения, куста или скважины"""
+    global _snapshot, _generation
+    _snapshot = None
+    _generation += 1
+
+
+async def _build(session: AsyncSession) -> bytes:
+    query = (
+        select(Location.id, Location.name, Cluster.id, Cluster.name, Well.id, Well.name)
+        .outerjoin(Cluster, Cluster.location_id == Location.id)
+        .outerjoin(Well, Well.cluster_id == Cluster.id)
+        .order_by(Location.name, Location.id, Cluster.name, Cluster.id, Well.name, Well.id)
+    )
+    locations, clusters = {}, {}
+    for location_id, location_name, cluster_id, cluster_name, well_id, well_name in await session.execute(query):
+        location = locations.setdefault(location_id, {"id": location_id, "name": location_name, "clusters": []})
+        if cluster_id is None:
+            continue
+        if cluster_id not in clusters:
+            clusters[cluster_id] = {"id": cluster_id, "name": cluster_name, "wells": []}
+            location["clusters"].append(clusters[cluster_id])
+        if well_id is not None:
+            clusters[cluster_id]["wells"].append({"id": well_id, "name": well_name})
+    return _adapter.dump_json(_adapter.validate_python(list(locations.values())))
+
+
+async def load_hierarchy(session: AsyncSession) -> HierarchySnapshot:
+    """
+    Возвращает снимок дерева месторождение → куст → скважина, при необходимости строя его одним запросом.
+    Одновременные промахи ждут одного построения, а не идут в БД каждый.
+    """
+    global _snapshot
+    async with _lock:
+        snapshot = cached_hierarchy()
+        if snapshot is not None:
+            return snapshot
+
+        generation = _generation
+        body = await _build(session)
+        snapshot = HierarchySnapshot(
+            body=body,
+            etag='"' + hashlib.sha256(body).hexdigest() + '"',
+            expires_at=time.monotonic() + settings.HIERARCHY_CACHE_TTL,
+        )
+        if generation == _generation:
+            _snapshot = snapshot
+        return snapshot
+
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from my_app_api.models.models import Job, Report, WellState
+from my_app_api.settings import get_settings
+from my_app_api.utils.calculation import (
+    FORMULA_VERSION, calculate_batch, calculations_for_states, delete_unused_calculations, link_calculations,
+    stale_reports_query, upsert_calculated
+)
+
+
+settings = get_settings()
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# Обработчик порции: получает задачу с текущим checkpoint, записывает результат порции в той же сессии
+# и возвращает (сколько обработано, новый checkpoint) либо None, если обрабатывать больше нечего
+ChunkHandler = Callable[[AsyncSession, Job, int], Awaitable[Optional[tuple[int, str]]]]
+
+
+async def recalculate_chunk(session: AsyncSession, job: Job, chunk_size: int) -> Optional[tuple[int, str]]:
+    """
+    Пересчитывает результаты для следующих chunk_size отчётов в порядке Report.id и направляет отчёты на них.
+    С params["only_stale"] берутся только отчёты с устаревшим расчётом (stale_reports_query), а уже посчитанные
+    текущей версией состояния не пересчитываются. В конце удаляются результаты прошлых версий без ссылок.
+    """
+    only_stale = job.params.get("only_stale")
+    if only_stale:
+        query = stale_reports_query()
+    else:
+        query = select(Report.id, Report.well_state_id, WellState.depth, WellState.pressure).join(
+            WellState, WellState.id == Report.well_state_id
+        )
+    query = query.order_by(Report.id).limit(chunk_size)
+    if job.checkpoint:
+        query = query.where(Report.id > UUID(job.checkpoint))
+    rows = (await session.execute(query)).all()
+    if not rows:
+        await delete_unused_calculations(session)
+        return None
+
+    states = {row.well_state_id: (row.depth, row.pressure) for row in rows}
+    if only_stale:
+        await calculations_for_states(session, states)
+    else:
+        state_ids = list(states)
+        depths, pressures = zip(*states.values())
+        batch = calculate_batch(depths, pressures)
+        values = [
+            {
+                "id": uuid4(),
+                "well_state_id": state_id,
+                **{name: column[i].item() for name, column in zip(batch._fields, batch)},
+                "calculation_version": FORMULA_VERSION,
+            }
+            for i, state_id in enumerate(state_ids)
+        ]
+        await session.execute(upsert_calculated(), values)
+    await link_calculations(session, [row.id for row in rows])
+    return len(rows), str(rows[-1].id)
+
+
+JOB_HANDLERS: dict[str, ChunkHandler] = {
+    "recalculate": recalculate_chunk,
+}
+
+
+async def claim_job(session: AsyncSession, worker: str) -> Optional[Job]:
+    """
+    Забирает самую старую ожидающую задачу или задачу, воркер которой перестал обновлять heartbeat.
+    SKIP LOCKED позволяет нескольким воркерам опрашивать таблицу одновременно, не блокируя друг друга.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT)
+    result = await session.execute(
+        select(Job)
+        .where(
+            Job.kind.in_(list(JOB_HANDLERS)),
+            or_(Job.status == "pending", and_(Job.status == "running", Job.heartbeat_at < stale_before)),
+        )
+        .order_by(Job.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await session.rollback()
+        return None
+
+    job.status = "running"
+    job.worker = worker
+    job.attempts += 1
+    job.started_at = job.started_at or now
+    job.heartbeat_at = now
+    job.error = None
+    await session.commit()
+    return job
+
+
+def job_progress(job: Job) -> dict:
+    """Скорость (записей в секунду с первого запуска) и оценка оставшегося времени"""
+    rate, eta = None, None
+    if job.started_at and job.processed:
+        elapsed = ((job.finished_at or job.heartbeat_at or datetime.utcnow()) - job.started_at).total_seconds()
+        if elapsed > 0:
+            rate = job.processed / elapsed
+            eta = 0.0 if job.status == "done" else max(job.total - job.processed, 0) / rate
+    return {
+        "rate_per_second": round(rate, 1) if rate is not None else None,
+        "eta_seconds": round(eta, 1) if eta is not None else None,
+    }
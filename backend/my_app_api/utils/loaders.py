@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from my_app_api.models.models import Report
+from my_app_api.schemas.schemas import ReportOut
+
+
+# Связи, которые читает каждая схема ответа. Загружаются вместе с основным запросом,
+# чтобы сериализация не делала ленивых запросов (в asyncio это MissingGreenlet)
+LOADER_PRESETS: dict[type[BaseModel], tuple[LoaderOption, ...]] = {
+    # well_state нужен для пересчёта устаревших результатов после записи (refresh_stale_calculations)
+    ReportOut: (joinedload(Report.calculated), joinedload(Report.well_state)),
+}
+
+
+def loader_options(schema: type[BaseModel]) -> tuple[LoaderOption, ...]:
+    return LOADER_PRESETS[schema]
@@ -0,0 +1,156 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import Scope
+
+
+# При нескольких воркерах gunicorn каждый процесс пишет значения в файлы каталога PROMETHEUS_MULTIPROC_DIR,
+# а /metrics собирает их вместе. Каталог должен существовать и очищаться до запуска воркеров
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса до отправки заголовков ответа",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "Запросы, обрабатываемые в данный момент",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+db_statements_per_request = Histogram(
+    "db_statements_per_request",
+    "Число SQL-выражений за запрос",
+    ["route"],
+    buckets=STATEMENT_BUCKETS,
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds",
+    "Суммарное время SQL-выражений за запрос",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds",
+    "Время выполнения одного SQL-выражения",
+    buckets=LATENCY_BUCKETS,
+)
+calculation_duration = Histogram(
+    "calculation_duration_seconds",
+    "Время одного пакетного расчёта (calculate_batch)",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+calculation_rows = Counter("calculation_rows", "Число состояний скважин, прошедших через calculate_batch")
+
+
+@dataclass
+class RequestStats:
+    """Статистика текущего HTTP-запроса; заполняется обработчиками событий движка"""
+
+    scope: Scope
+    statements: int = 0
+    db_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def route(self) -> str:
+        # Шаблон пути, а не сам путь, чтобы число рядов метрик не зависело от идентификаторов в URL.
+        # Роутер дописывает route в тот же scope, поэтому во время запроса к БД он уже известен
+        route = self.scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    db_statement_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время ответа по шаблону маршрута, запросы в работе и статистика БД за запрос"""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"].endswith("/metrics"):
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = current_request.set(stats)
+        responded = False
+        in_progress = http_requests_in_progress.labels(method=scope["method"])
+        in_progress.inc()
+
+        def observe_latency(status: int) -> None:
+            elapsed = time.perf_counter() - stats.started_at
+            http_request_duration.labels(scope["method"], stats.route, str(status)).observe(elapsed)
+
+        async def send_wrapper(message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                observe_latency(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not responded:
+                observe_latency(500)
+            in_progress.dec()
+            current_request.reset(token)
+            db_statements_per_request.labels(stats.route).observe(stats.statements)
+            db_time_per_request.labels(stats.route).observe(stats.db_seconds)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Метрики в текстовом формате Prometheus; в многопроцессном режиме — сумма по всем воркерам"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Удаляет live-метрики завершившегося воркера (вызывается при остановке приложения)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,70 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+from my_app_api.settings import get_settings
+
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+
+
+def page_params(
+    cursor: Optional[str] = Query(None),  # Значение next_cursor из предыдущей страницы
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1),  # Размер страницы, не больше PAGE_SIZE_MAX
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=min(limit, settings.PAGE_SIZE_MAX))
+
+
+def encode_cursor(created: datetime, row_id: UUID) -> str:
+    raw = json.dumps([created.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created, row_id = json.loads(raw)
+        return datetime.fromisoformat(created), UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    created_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    params: PageParams,
+) -> dict:
+    """
+    Keyset-пагинация по паре (время создания, id): страница читается по индексу с позиции курсора,
+    поэтому стоимость запроса не зависит от номера страницы.
+    """
+    if params.cursor:
+        query = query.where(tuple_(created_column, id_column) > tuple_(*decode_cursor(params.cursor)))
+    query = query.order_by(created_column, id_column).limit(params.limit + 1)
+
+    result = await session.execute(query)
+    items = result.scalars().unique().all()
+
+    next_cursor = None
+    if len(items) > params.limit:
+        items = items[:params.limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import Literal, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+
+from my_app_api.models.models import Report, User, UserReportPermission
+
+
+# read — любая запись прав, edit — can_edit, owner — is_owner
+AccessLevel = Literal["read", "edit", "owner"]
+
+
+@dataclass(frozen=True)
+class ReportAccess:
+    """Отчёт, права вызывающего на него и целевой пользователь операции с доступом"""
+
+    report: Report
+    has_access: bool
+    is_owner: bool
+    can_edit: bool
+    target_user_id: Optional[UUID] = None
+
+    def allows(self, level: AccessLevel) -> bool:
+        if level == "owner":
+            return self.is_owner
+        if level == "edit":
+            return self.can_edit
+        return self.has_access
+
+
+async def authorize_report(
+    session: AsyncSession,
+    report_id: UUID,
+    user_id: UUID,
+    level: AccessLevel = "read",
+    target_email: Optional[str] = None,
+) -> ReportAccess:
+    """
+    Одним запросом читает отчёт, права пользователя на него и, если передан target_email,
+    пользователя, которому выдаётся или отзывается доступ. Отвечает 404, если отчёта
+    или целевого пользователя нет, и 403, если прав меньше, чем level.
+    """
+    caller = aliased(UserReportPermission)
+    query = (
+        select(Report, caller.id, caller.is_owner, caller.can_edit)
+        .outerjoin(caller, (caller.report_id == Report.id) & (caller.user_id == user_id))
+        .where(Report.id == report_id)
+    )
+    if target_email is not None:
+        target = aliased(User)
+        query = query.add_columns(target.id).outerjoin(target, target.email == target_email)
+
+    row = (await session.execute(query)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Отчёт не найден")
+    access = ReportAccess(
+        report=row[0],
+        has_access=row[1] is not None,
+        is_owner=bool(row[2]),
+        can_edit=bool(row[3]),
+        target_user_id=row[4] if target_email is not None else None,
+    )
+    if not access.allows(level):
+        detail = {
+            "read": "Нет доступа к отчёту",
+            "edit": "Нет прав на редактирование отчёта",
+            "owner": "Нет прав на управление доступом",
+        }[level]
+        raise HTTPException(status_code=403, detail=detail)
+    if target_email is not None and access.target_user_id is None:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    return access
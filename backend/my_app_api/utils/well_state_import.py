@@ -0,0 +1,106 @@
+import csv
+import io
+import math
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Iterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+COPY_COLUMNS = ["id", "well_id", "date_created", "depth", "pressure"]
+
+
+@dataclass
+class WellDirectory:
+    """
+    Справочник скважин, загружаемый одним запросом перед импортом.
+    Имя, встречающееся у нескольких скважин, считается неоднозначным — такие строки нужно адресовать по well_id.
+    """
+
+    ids: set[uuid.UUID] = field(default_factory=set)
+    by_name: dict[str, Optional[uuid.UUID]] = field(default_factory=dict)
+
+    def add(self, well_id: uuid.UUID, name: str) -> None:
+        self.ids.add(well_id)
+        key = name.strip().lower()
+        self.by_name[key] = None if key in self.by_name else well_id
+
+    def resolve(self, well_id: str, name: str) -> uuid.UUID:
+        if well_id:
+            try:
+                resolved = uuid.UUID(well_id)
+            except ValueError:
+                raise ValueError("Некорректный well_id")
+            if resolved not in self.ids:
+                raise ValueError("Скважина не найдена")
+            return resolved
+
+        key = name.strip().lower()
+        if not key:
+            raise ValueError("Не указана скважина")
+        if key not in self.by_name:
+            raise ValueError(f"Скважина «{name}» не найдена")
+        if self.by_name[key] is None:
+            raise ValueError(f"Имя скважины «{name}» неоднозначно, укажите well_id")
+        return self.by_name[key]
+
+
+def _parse_float(value: str) -> Optional[float]:
+    value = value.strip().replace(",", ".")
+    if not value:
+        return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError
+    return number
+
+
+def parse_rows(
+    file: IO[bytes], wells: WellDirectory, delimiter: str = ","
+) -> Iterator[tuple[int, Optional[tuple], Optional[str]]]:
+    """
+    Построчно читает CSV и для каждой строки данных возвращает (номер строки, запись для COPY, ошибка).
+    Ожидаемые колонки: well или well_id, depth, pressure и необязательная date_created (ISO 8601).
+    Файл не загружается в память целиком — строки разбираются по мере чтения.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text, delimiter=delimiter)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    if "well" not in reader.fieldnames and "well_id" not in reader.fieldnames:
+        raise ValueError("В заголовке CSV нет колонки well или well_id")
+
+    imported_at = datetime.utcnow()
+    for row in reader:
+        line = reader.line_num
+        try:
+            well_id = wells.resolve(row.get("well_id") or "", row.get("well") or "")
+        except ValueError as error:
+            yield line, None, str(error)
+            continue
+        try:
+            depth = _parse_float(row.get("depth") or "")
+            pressure = _parse_float(row.get("pressure") or "")
+        except ValueError:
+            yield line, None, "Некорректное значение depth или pressure"
+            continue
+        try:
+            date_value = (row.get("date_created") or "").strip()
+            date_created = datetime.fromisoformat(date_value) if date_value else imported_at
+        except ValueError:
+            yield line, None, "Некорректная дата date_created"
+            continue
+        if date_created.tzinfo is not None:
+            # В БД хранится UTC без часового пояса, как и datetime.utcnow у модели
+            date_created = date_created.astimezone(timezone.utc).replace(tzinfo=None)
+        yield line, (uuid.uuid4(), well_id, date_created, depth, pressure), None
+
+
+async def copy_well_states(session: AsyncSession, records: list[tuple]) -> None:
+    """Загружает записи в well_states через COPY в текущей транзакции сессии (триггеры срабатывают построчно)"""
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        "well_states", records=records, columns=COPY_COLUMNS
+    )
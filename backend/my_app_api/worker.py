@@ -0,0 +1,111 @@
+"""
+Воркер фоновых задач (таблица jobs). Запускается отдельными процессами рядом с API:
+
+    python -m my_app_api.worker --name worker-1
+
+Каждая порция задачи выполняется в своей транзакции вместе с обновлением checkpoint, processed и heartbeat,
+поэтому после падения процесса задача продолжается с последней зафиксированной порции — её заберёт
+любой воркер, когда heartbeat устареет на JOB_HEARTBEAT_TIMEOUT секунд.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import traceback
+from datetime import datetime
+from uuid import UUID
+
+from my_app_api.database import async_session_maker
+from my_app_api.models.models import Job
+from my_app_api.settings import get_settings
+from my_app_api.utils.jobs import JOB_HANDLERS, claim_job
+
+
+logger = logging.getLogger("my_app_api.worker")
+settings = get_settings()
+
+
+class Worker:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stopping = False
+
+    def stop(self) -> None:
+        logger.info("Остановка после текущей порции")
+        self.stopping = True
+
+    async def run_job(self, job_id: UUID) -> None:
+        while True:
+            async with async_session_maker() as session:
+                # Блокировка строки задачи на время порции: параллельный захват этой задачи невозможен
+                job = await session.get(Job, job_id, with_for_update=True)
+                if job is None or job.status != "running" or job.worker != self.name:
+                    logger.warning("Задача %s больше не принадлежит воркеру %s", job_id, self.name)
+                    return
+                if self.stopping:
+                    job.status, job.worker = "pending", None
+                    await session.commit()
+                    return
+
+                result = await JOB_HANDLERS[job.kind](session, job, settings.JOB_CHUNK_SIZE)
+                job.heartbeat_at = datetime.utcnow()
+                if result is None:
+                    job.status = "done"
+                    job.finished_at = job.heartbeat_at
+                else:
+                    processed, job.checkpoint = result
+                    job.processed += processed
+                await session.commit()
+                if result is None:
+                    logger.info("Задача %s завершена: обработано %s", job_id, job.processed)
+                    return
+
+    async def fail_job(self, job_id: UUID, error: str) -> None:
+        async with async_session_maker() as session:
+            job = await session.get(Job, job_id, with_for_update=True)
+            if job is None or job.worker != self.name:
+                return
+            # Повтор продолжит с последнего checkpoint
+            job.status = "failed" if job.attempts >= settings.JOB_MAX_ATTEMPTS else "pending"
+            job.worker = None
+            job.error = error
+            job.finished_at = datetime.utcnow() if job.status == "failed" else None
+            await session.commit()
+
+    async def run(self, once: bool = False) -> None:
+        logger.info("Воркер %s запущен", self.name)
+        while not self.stopping:
+            async with async_session_maker() as session:
+                job = await claim_job(session, self.name)
+            if job is None:
+                if once:
+                    return
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+                continue
+
+            logger.info("Задача %s (%s), попытка %s, checkpoint %s", job.id, job.kind, job.attempts, job.checkpoint)
+            try:
+                await self.run_job(job.id)
+            except Exception:
+                logger.exception("Задача %s завершилась ошибкой", job.id)
+                await self.fail_job(job.id, traceback.format_exc(limit=5))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Воркер фоновых задач")
+    parser.add_argument("--name", default=f"{socket.gethostname()}:{os.getpid()}")
+    parser.add_argument("--once", action="store_true", help="Выйти, когда очередь опустеет")
+    args = parser.parse_args()
+
+    worker = Worker(args.name)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    await worker.run(once=args.once)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
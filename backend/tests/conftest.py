@@ -1,9 +1,97 @@
+from contextlib import contextmanager
+from uuid import UUID, uuid4
+
 import pytest
 from fastapi.testclient import TestClient
-from my_app_api.routes import app
+from my_app_api.__main__ import app
+from my_app_api.database import engine
+from my_app_api.models.models import Cluster, Location, User, Well
+from my_app_api.settings import get_settings
+from my_app_api.utils.auth import create_access_token
+from my_app_api.utils.query_counter import count_queries
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
 
 
-@pytest.fixture
+# Списочный маршрут должен укладываться в это число SQL-выражений независимо от количества строк
+LIST_ENDPOINT_MAX_QUERIES = 3
+
+
+@pytest.fixture(scope="session")
 def client():
-    client = TestClient(app)
-    yield client
+    # Один event loop на все тесты: соединения пула asyncpg привязаны к циклу, в котором открыты
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """Синхронное подключение к той же (мигрированной) БД для подготовки данных"""
+    sync_engine = create_engine(make_url(get_settings().DB_DSN).set(drivername="postgresql+psycopg2"))
+    yield sync_engine
+    sync_engine.dispose()
+
+
+@pytest.fixture
+def make_user(db_engine):
+    """Создаёт пользователя и возвращает заголовки авторизации от его имени"""
+
+    def _make_user(is_admin: bool = False) -> dict:
+        email = f"test-{uuid4().hex}@example.com"
+        with Session(db_engine) as session:
+            session.add(User(email=email, password_hash="!", is_admin=is_admin))
+            session.commit()
+        return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+    return _make_user
+
+
+@pytest.fixture
+def well_id(db_engine) -> UUID:
+    """Отдельные месторождение, куст и скважина для теста"""
+    suffix = uuid4().hex
+    with Session(db_engine) as session:
+        location = Location(name=f"Месторождение {suffix}")
+        cluster = Cluster(name=f"Куст {suffix}", location=location)
+        well = Well(name=f"Скважина {suffix}", cluster=cluster)
+        session.add(well)
+        session.commit()
+        return well.id
+
+
+@pytest.fixture
+def seed_reports(client):
+    """Создаёт count отчётов пользователя по скважине через /reports/apply-batch и возвращает их id"""
+
+    def _seed_reports(headers: dict, well_id: UUID, count: int) -> list[str]:
+        items = [
+            {"well_id": str(well_id), "depth": 1000.0 + i, "pressure": 10.0 + i, "title": f"Отчёт {i}"}
+            for i in range(count)
+        ]
+        response = client.post("/reports/apply-batch", json=items, headers=headers)
+        assert response.status_code == 200, response.text
+        assert all(item["ok"] for item in response.json()), response.text
+        return [item["report_id"] for item in response.json()]
+
+    return _seed_reports
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Падает, если внутри блока выполнено больше SQL-выражений, чем разрешено:
+
+        with assert_max_queries(LIST_ENDPOINT_MAX_QUERIES):
+            client.get("/reports/")
+    """
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with count_queries(engine) as counter:
+            yield counter
+        assert counter.count <= limit, f"Выполнено {counter.count} SQL-выражений (лимит {limit}):\n" + "\n".join(
+            counter.statements
+        )
+
+    return _assert_max_queries
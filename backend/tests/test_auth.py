@@ -0,0 +1,42 @@
+from jose import jwt
+from my_app_api.models.models import User
+from my_app_api.utils.auth import ALGORITHM, SECRET_KEY
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+
+def _email(headers: dict) -> str:
+    token = headers["Authorization"].removeprefix("Bearer ")
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+
+
+def test_token_without_exp_is_rejected(client, make_user):
+    email = _email(make_user())
+    token = jwt.encode({"sub": email}, SECRET_KEY, algorithm=ALGORITHM)
+
+    response = client.get("/reports/", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+
+
+def test_admin_flag_change_invalidates_cached_user(client, db_engine, make_user):
+    headers = make_user()
+    assert client.get("/reports/admin/reports", headers=headers).status_code == 403
+
+    email = _email(headers)
+    with Session(db_engine) as session:
+        session.scalars(select(User).where(User.email == email)).one().is_admin = True
+        session.commit()
+
+    assert client.get("/reports/admin/reports", headers=headers).status_code == 200
+
+
+def test_admin_revoked_out_of_band_loses_access_immediately(client, db_engine, make_user):
+    headers = make_user(is_admin=True)
+    assert client.get("/reports/admin/reports", headers=headers).status_code == 200
+
+    # Изменение напрямую в БД не проходит через события сессии и не сбрасывает кэш пользователей
+    with db_engine.begin() as connection:
+        connection.execute(update(User).where(User.email == _email(headers)).values(is_admin=False))
+
+    assert client.get("/reports/admin/reports", headers=headers).status_code == 403
@@ -0,0 +1,97 @@
+import pytest
+
+from my_app_api.utils import cache as cache_module
+from my_app_api.utils import calculation
+from my_app_api.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats() == {"size": 0, "maxsize": 10, "ttl": 5, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_per_entry_ttl_cannot_exceed_cache_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2, ttl=100)
+    clock.now += 1
+    assert cache.get("short") is None
+    clock.now += 3.9
+    assert cache.get("long") == 2
+    clock.now += 0.1
+    assert cache.get("long") is None
+
+
+def test_lru_eviction_order(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" становится самым свежим
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("a", 10)  # перезапись тоже освежает запись
+    cache.set("d", 4)
+    assert cache.get("c") is None
+    assert cache.get("a") == 10
+
+
+def test_counters(clock):
+    cache = TTLCache(maxsize=1, ttl=60)
+    assert cache.get("missing", "default") == "default"
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.set("b", 2)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 1, 1, 1)
+
+
+def test_zero_maxsize_disables_cache(clock):
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_memo_reset_on_formula_version_change(monkeypatch):
+    calculation.clear_calculation_cache()
+    calculation.calculate_values(1000.0, 10.0)
+    before = calculation.calculation_cache_stats()
+    assert before["size"] >= 1
+
+    monkeypatch.setattr(calculation, "FORMULA_VERSION", "test-next")
+    calculation.calculate_values(1000.0, 10.0)
+    after = calculation.calculation_cache_stats()
+    assert after["formula_version"] == "test-next"
+    assert after["invalidations"] == before["invalidations"] + 1
+    assert after["size"] == 1
+    assert after["misses"] == before["misses"] + 1
+
+    # Повторный вызов той же версией берётся из кэша
+    calculation.calculate_values(1000.0, 10.0)
+    assert calculation.calculation_cache_stats()["hits"] == after["hits"] + 1
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from my_app_api.utils.calculation import calculate_batch, calculate_many, calculate_values, input_errors
+
+
+def _scalar(depth, pressure):
+    """Исходный скалярный расчёт calculate_from_well_state, с которым должен совпадать векторный"""
+    depth = depth or 0.0
+    pressure = pressure or 0.0
+    required_charges = int((depth * pressure) / 1000) if pressure > 0 else 0
+    effective_pressure = pressure * 0.9
+    gas_volume = depth * 0.5
+    impact_duration = pressure / 2 if pressure > 0 else 0
+    return effective_pressure, required_charges, gas_volume, impact_duration
+
+
+FINITE_CASES = [
+    (None, None),
+    (0.0, 0.0),
+    (-0.0, 0.0),
+    (1000.0, None),
+    (None, 10.0),
+    (-100.0, 5.0),
+    (2500.0, -3.0),
+    (1234.5, 17.25),
+    (1e9, 1e3),
+    (2147483647.0, 1000.0),  # Ровно верхняя граница int4
+    (-2147483648.0, 1000.0),
+]
+
+
+@pytest.mark.parametrize("depth, pressure", FINITE_CASES)
+def test_batch_matches_scalar(depth, pressure):
+    batch = calculate_batch([depth], [pressure])
+    assert tuple(column[0].item() for column in batch) == _scalar(depth, pressure)
+    assert tuple(calculate_values(depth, pressure)) == _scalar(depth, pressure)
+
+
+def test_batch_matches_scalar_row_by_row():
+    depths, pressures = zip(*FINITE_CASES)
+    batch = calculate_batch(depths, pressures)
+    for i, (depth, pressure) in enumerate(FINITE_CASES):
+        assert tuple(column[i].item() for column in batch) == _scalar(depth, pressure)
+    assert [tuple(values) for values in calculate_many(depths, pressures)] == [_scalar(*case) for case in FINITE_CASES]
+
+
+def test_batch_accepts_float_arrays():
+    depth, pressure = np.array([1000.0, 2000.0]), np.array([10.0, 0.0])
+    assert calculate_batch(depth, pressure).required_charges.tolist() == [10, 0]
+
+
+@pytest.mark.parametrize(
+    "depth, pressure",
+    [(math.nan, 10.0), (10.0, math.nan), (math.inf, 10.0), (10.0, -math.inf), (1e300, 1e300), (1e300, 10.0)],
+)
+def test_non_finite_and_out_of_range_rejected(depth, pressure):
+    with pytest.raises(ValueError):
+        calculate_batch([depth], [pressure])
+    with pytest.raises(ValueError):
+        calculate_values(depth, pressure)
+
+
+@pytest.mark.parametrize("depth, pressure", [(2147483648.0, 1000.0), (-2147483649.0, 1000.0), (1e9, 1e4), (1e12, 1e6)])
+def test_charges_outside_int4_rejected(depth, pressure):
+    # report_calculated.required_charges — Integer: такие значения не вставить в БД
+    with pytest.raises(ValueError, match="int32"):
+        calculate_batch([depth], [pressure])
+
+
+def test_input_errors_match_calculate_batch():
+    depths = [1000.0, math.nan, 1e12, None, 2147483647.0]
+    pressures = [10.0, 10.0, 1e6, None, 1000.0]
+
+    errors = input_errors(depths, pressures)
+
+    assert [error is None for error in errors] == [True, False, False, True, True]
+    assert "конечными" in errors[1] and "int32" in errors[2]
+    for depth, pressure, error in zip(depths, pressures, errors):
+        if error is None:
+            calculate_batch([depth], [pressure])
+        else:
+            with pytest.raises(ValueError, match=error):
+                calculate_batch([depth], [pressure])
+
+
+def test_length_mismatch_rejected():
+    with pytest.raises(ValueError):
+        calculate_batch([1.0, 2.0], [1.0])
@@ -0,0 +1,9 @@
+from benchmarks.calculation import GOLDEN_PATH, check_golden
+
+
+def test_calculation_matches_committed_golden():
+    assert GOLDEN_PATH.exists()
+
+    problems = check_golden()
+
+    assert problems == [], "\n".join(problems[:20])
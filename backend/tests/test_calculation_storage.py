@@ -0,0 +1,52 @@
+from uuid import uuid4
+
+from my_app_api.database import async_session_maker, engine
+from my_app_api.models.models import ReportCalculated, WellState
+from my_app_api.utils.calculation import FORMULA_VERSION, calculate_values, calculations_for_states
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+
+def test_concurrent_insert_of_same_state_returns_existing_row(client, db_engine, well_id):
+    states = {uuid4(): (1500.0, 20.0), uuid4(): (2500.0, 30.0), uuid4(): (3500.0, 40.0)}
+    with Session(db_engine) as session:
+        session.add_all(
+            WellState(id=state_id, well_id=well_id, depth=depth, pressure=pressure)
+            for state_id, (depth, pressure) in states.items()
+        )
+        session.commit()
+    conflicting_state, concurrent_id = next(iter(states)), uuid4()
+    inserted = []
+
+    def insert_concurrently(conn, cursor, statement, parameters, context, executemany):
+        # Другой запрос успевает вставить результат для того же состояния между SELECT и INSERT
+        if statement.startswith("INSERT INTO report_calculated") and not inserted:
+            inserted.append(concurrent_id)
+            with db_engine.begin() as other:
+                other.execute(
+                    insert(ReportCalculated).values(
+                        id=concurrent_id,
+                        well_state_id=conflicting_state,
+                        calculation_version=FORMULA_VERSION,
+                        **calculate_values(*states[conflicting_state])._asdict(),
+                    )
+                )
+
+    async def calculate():
+        async with async_session_maker() as session:
+            calculations = await calculations_for_states(session, states)
+            await session.commit()
+            return calculations
+
+    event.listen(engine.sync_engine, "before_cursor_execute", insert_concurrently)
+    try:
+        calculations = client.portal.call(calculate)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", insert_concurrently)
+
+    assert inserted
+    assert set(calculations) == set(states)
+    assert calculations[conflicting_state].id == concurrent_id
+    for state_id, (depth, pressure) in states.items():
+        assert calculations[state_id].well_state_id == state_id
+        assert calculations[state_id].required_charges == calculate_values(depth, pressure).required_charges
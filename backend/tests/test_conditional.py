@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from my_app_api.utils.conditional import _not_modified_since, conditional_get, etag_matches, mark_modified
+
+
+ETAG = '"wells-abcd1234-7"'
+LAST_MODIFIED = datetime(2024, 5, 17, 12, 30, 45, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ("", False),
+        ('"wells-abcd1234-7"', True),
+        ('W/"wells-abcd1234-7"', True),
+        ("*", True),
+        (" * ", True),
+        ('"wells-abcd1234-6"', False),
+        ('"wells-abcd1234-6", W/"wells-abcd1234-7"', True),
+        ('"a","wells-abcd1234-7" , "b"', True),
+        ('"a", "b"', False),
+        ("wells-abcd1234-7", False),  # Без кавычек это не тот же ETag
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, ETAG) is expected
+
+
+@pytest.mark.parametrize(
+    "if_modified_since, expected",
+    [
+        (format_datetime(LAST_MODIFIED, usegmt=True), True),
+        (format_datetime(LAST_MODIFIED + timedelta(seconds=1), usegmt=True), True),
+        (format_datetime(LAST_MODIFIED - timedelta(seconds=1), usegmt=True), False),
+        ("Fri, 17 May 2024 12:30:45", True),  # Без зоны считается UTC
+        ("не дата", False),
+        ("", False),
+    ],
+)
+def test_not_modified_since(if_modified_since, expected):
+    assert _not_modified_since(if_modified_since, LAST_MODIFIED) is expected
+
+
+@pytest.fixture
+def conditional_client():
+    app = FastAPI()
+
+    @app.get("/wells", dependencies=[Depends(conditional_get("wells"))])
+    async def wells():
+        return []
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_conditional_get_sets_validators(conditional_client):
+    response = conditional_client.get("/wells")
+
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"wells-')
+    assert "last-modified" in response.headers
+    assert "must-revalidate" in response.headers["cache-control"]
+
+
+@pytest.mark.parametrize("as_weak", [True, False])
+def test_conditional_get_if_none_match(conditional_client, as_weak):
+    etag = conditional_client.get("/wells").headers["etag"]
+    if_none_match = etag if as_weak else etag.removeprefix("W/")
+
+    response = conditional_client.get("/wells", headers={"If-None-Match": if_none_match})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert conditional_client.get("/wells", headers={"If-None-Match": "*"}).status_code == 304
+    assert conditional_client.get("/wells", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+
+
+def test_conditional_get_if_modified_since(conditional_client):
+    last_modified = conditional_client.get("/wells").headers["last-modified"]
+
+    assert conditional_client.get("/wells", headers={"If-Modified-Since": last_modified}).status_code == 304
+    stale = format_datetime(datetime(2000, 1, 1, tzinfo=timezone.utc), usegmt=True)
+    assert conditional_client.get("/wells", headers={"If-Modified-Since": stale}).status_code == 200
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(conditional_client):
+    last_modified = conditional_client.get("/wells").headers["last-modified"]
+
+    response = conditional_client.get(
+        "/wells", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    )
+
+    assert response.status_code == 200
+
+
+def test_mark_modified_changes_etag(conditional_client):
+    etag = conditional_client.get("/wells").headers["etag"]
+
+    mark_modified("wells")
+
+    response = conditional_client.get("/wells", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
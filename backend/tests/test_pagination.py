@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+from my_app_api.models.models import Report
+from my_app_api.settings import get_settings
+from my_app_api.utils.pagination import decode_cursor, encode_cursor, page_params
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    created = datetime(2024, 5, 17, 12, 30, 45, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+
+    cursor = encode_cursor(created, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created, row_id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "!!!",
+        _b64(b"not json"),
+        _b64(json.dumps(["2024-05-17T12:30:45"]).encode()),
+        _b64(json.dumps({"created": "2024-05-17T12:30:45", "id": str(uuid4())}).encode()),
+        _b64(json.dumps(["не дата", str(uuid4())]).encode()),
+        _b64(json.dumps(["2024-05-17T12:30:45", "не uuid"]).encode()),
+        _b64(json.dumps([1, 2]).encode()),
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        lambda cursor: cursor[:-4],  # Обрезан конец JSON
+        lambda cursor: "X" + cursor[1:],  # Испорчена открывающая скобка
+        lambda cursor: cursor[:10] + "*" + cursor[11:],  # Символ не из алфавита base64
+    ],
+)
+def test_tampered_cursor_is_rejected(tamper):
+    cursor = encode_cursor(datetime(2024, 5, 17, tzinfo=timezone.utc), uuid4())
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(tamper(cursor))
+    assert exc_info.value.status_code == 400
+
+
+def test_malformed_cursor_returns_400(client, make_user):
+    response = client.get("/reports/", params={"cursor": "!!!"}, headers=make_user())
+    assert response.status_code == 400
+
+
+def test_page_size_is_clamped():
+    settings = get_settings()
+
+    assert page_params(cursor=None, limit=settings.PAGE_SIZE_MAX * 10).limit == settings.PAGE_SIZE_MAX
+    assert page_params(cursor=None, limit=5).limit == 5
+
+
+def test_pages_are_stable_on_created_at_ties(client, db_engine, make_user, well_id, seed_reports):
+    headers = make_user()
+    report_ids = seed_reports(headers, well_id, 7)
+    # Одинаковое время создания: порядок страниц держится только на id
+    with Session(db_engine) as session:
+        session.execute(
+            update(Report)
+            .where(Report.id.in_([UUID(report_id) for report_id in report_ids]))
+            .values(created_at=datetime(2024, 1, 1))
+        )
+        session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/reports/", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(report_ids, key=UUID)
@@ -0,0 +1,80 @@
+from uuid import UUID
+
+import pytest
+from my_app_api.models.models import Report, ReportCalculated
+from my_app_api.settings import get_settings
+from sqlalchemy import select, update
+
+from tests.conftest import LIST_ENDPOINT_MAX_QUERIES
+
+
+REPORTS_PER_STEP = 5
+
+
+@pytest.mark.parametrize("path, is_admin", [("/reports/", False), ("/reports/admin/reports", True)])
+def test_list_query_count_does_not_grow_with_reports(
+    client, make_user, well_id, seed_reports, assert_max_queries, path, is_admin
+):
+    headers = make_user(is_admin=is_admin)
+    params = {"limit": get_settings().PAGE_SIZE_MAX}
+    # Прогрев: пользователь попадает в кэш авторизации, дальше считаются только запросы самого маршрута
+    assert client.get(path, params=params, headers=headers).status_code == 200
+
+    counts = []
+    for total in (REPORTS_PER_STEP, 2 * REPORTS_PER_STEP):
+        seed_reports(headers, well_id, REPORTS_PER_STEP)
+        with assert_max_queries(LIST_ENDPOINT_MAX_QUERIES) as counter:
+            response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) >= total
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
+
+
+def test_apply_rejects_charges_outside_column_range(client, make_user, well_id):
+    body = {"well_id": str(well_id), "depth": 1e12, "pressure": 1e6, "title": "Переполнение"}
+
+    response = client.post("/reports/apply", json=body, headers=make_user())
+
+    assert response.status_code == 422
+    assert "int32" in response.json()["detail"]
+
+
+def test_apply_batch_reports_overflow_per_item(client, make_user, well_id):
+    items = [
+        {"well_id": str(well_id), "depth": 1000.0, "pressure": 10.0, "title": "Обычный"},
+        {"well_id": str(well_id), "depth": 1e12, "pressure": 1e6, "title": "Переполнение"},
+    ]
+
+    response = client.post("/reports/apply-batch", json=items, headers=make_user())
+
+    assert response.status_code == 200, response.text
+    ok, overflow = response.json()
+    assert ok["ok"] and ok["calculated"]["required_charges"] == 10
+    assert not overflow["ok"] and "int32" in overflow["error"]
+
+
+@pytest.mark.parametrize("path, is_admin", [("/reports/", False), ("/reports/admin/reports", True)])
+def test_list_with_stale_calculations_only_marks_them(
+    client, db_engine, make_user, well_id, seed_reports, assert_max_queries, path, is_admin
+):
+    headers = make_user(is_admin=is_admin)
+    report_ids = [UUID(report_id) for report_id in seed_reports(headers, well_id, REPORTS_PER_STEP)]
+    # Результаты «прошлой версии формул» — как после увеличения FORMULA_VERSION
+    with db_engine.begin() as connection:
+        connection.execute(
+            update(ReportCalculated)
+            .where(ReportCalculated.id.in_(select(Report.calculated_id).where(Report.id.in_(report_ids))))
+            .values(calculation_version="stale")
+        )
+    params = {"limit": get_settings().PAGE_SIZE_MAX}
+    assert client.get(path, params=params, headers=headers).status_code == 200
+
+    with assert_max_queries(LIST_ENDPOINT_MAX_QUERIES) as counter:
+        response = client.get(path, params=params, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert not [statement for statement in counter.statements if not statement.lstrip().startswith("SELECT")]
+    items = {UUID(item["id"]): item for item in response.json()["items"]}
+    assert all(items[report_id]["calculation_stale"] for report_id in report_ids)
@@ -0,0 +1,57 @@
+import pytest
+from my_app_api.database import SlowQueryLog, engine, settings, slow_query_log
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+
+@pytest.fixture
+def explain_every_query(monkeypatch):
+    # Каждый запрос считается медленным, план снимается всегда
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 1.0)
+    slow_query_log.entries.clear()
+    yield
+    slow_query_log.entries.clear()
+
+
+@pytest.mark.parametrize(
+    "statement, prefix",
+    [
+        ("SELECT * FROM reports", "EXPLAIN (ANALYZE, BUFFERS) "),
+        ("  select 1", "EXPLAIN (ANALYZE, BUFFERS) "),
+        ("SELECT * FROM jobs FOR UPDATE SKIP LOCKED", "EXPLAIN "),
+        ("WITH source AS (SELECT 1) SELECT * FROM source", "EXPLAIN "),
+        ("WITH copied AS (INSERT INTO reports SELECT 1 RETURNING id) SELECT id FROM copied", "EXPLAIN "),
+        ("DELETE FROM reports WHERE id = $1 RETURNING id", "EXPLAIN "),
+        ("UPDATE reports SET title = $1", "EXPLAIN "),
+        ("SAVEPOINT sp", None),
+        ("COPY well_states FROM STDIN", None),
+    ],
+)
+def test_explain_prefix(statement, prefix):
+    assert SlowQueryLog._explain_prefix(statement) == prefix
+
+
+def test_sampled_write_cte_is_not_executed_twice(client, make_user, well_id, seed_reports, explain_every_query):
+    headers = make_user()
+    [report_id] = seed_reports(headers, well_id, 1)
+    slow_query_log.entries.clear()
+
+    response = client.post(f"/reports/{report_id}/copy", headers=headers)
+
+    assert response.status_code == 200, response.text
+    copy_plans = [entry["plan"] for entry in slow_query_log.entries if "gen_random_uuid" in entry["statement"]]
+    assert copy_plans and all(plan and "actual time" not in plan for plan in copy_plans)
+    reports = client.get("/reports/", headers=headers).json()["items"]
+    assert sorted(report["id"] == report_id for report in reports) == [False, True]
+
+
+def test_failed_statement_does_not_leak_start_time(client):
+    async def run_failing_statement():
+        async with engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT 1 / 0"))
+            return list(conn.info.get("slow_query_started_at", []))
+
+    assert client.portal.call(run_failing_statement) == []